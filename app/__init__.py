@@ -2,18 +2,28 @@ from flask import Flask, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from flask_swagger_ui import get_swaggerui_blueprint
-import threading
+import atexit
+import logging
 from app.config.settings import (
     DEBUG, HOST, PORT, CORS_ORIGINS, SWAGGER_URL, 
     API_URL, SWAGGER_CONFIG, SOCKET_CORS_ORIGINS,
-    UPDATE_INTERVAL, DEFAULT_SYMBOLS
+    UPDATE_INTERVAL, DEFAULT_SYMBOLS, INGESTION_ENABLED,
+    MESSAGE_BUS_URL, PRODUCER_ELECTION_INTERVAL
 )
 from app.api.routes import api
+from app.api.diagnostics import diagnostics
 from app.api.swagger import get_swagger_spec
 from app.api.websocket import websocket_handler
+from app.services.stock_service import crypto_service
+from app.services.coingecko_ingest import IngestionService
+from app.services.message_bus import create_message_bus, create_producer_election
+from app.utils.log_utils import configure_logging
+
+logger = logging.getLogger(__name__)
 
 def create_app():
     """Create Flask application"""
+    configure_logging()
     app = Flask(__name__)
     
     CORS(app, resources={r"/*": {"origins": CORS_ORIGINS}})
@@ -35,6 +45,7 @@ def create_app():
     # Register blueprints
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
     app.register_blueprint(api, url_prefix='/api')
+    app.register_blueprint(diagnostics)
     
     @app.route("/static/swagger.json")
     def swagger_spec():
@@ -43,40 +54,58 @@ def create_app():
     # Configure WebSocket events
     @socketio.on('connect')
     def handle_connect():
-        print(f"Client connecting with SID: {request.sid}")
+        logger.debug("Client connecting with SID: %s", request.sid)
         websocket_handler.handle_connect(request.sid, socketio)
 
     @socketio.on('disconnect')
     def handle_disconnect(data=None):
-        print(f"Client disconnecting with SID: {request.sid}")
+        logger.debug("Client disconnecting with SID: %s", request.sid)
         websocket_handler.handle_disconnect(request.sid)
 
     @socketio.on('subscribe')
     def handle_subscribe(symbols):
-        print(f"Client {request.sid} subscribing to: {symbols}")
+        logger.debug("Client %s subscribing to: %s", request.sid, symbols)
         websocket_handler.handle_subscribe(symbols, request.sid)
     
     @socketio.on_error()
     def error_handler(e):
-        print(f"SocketIO error: {e}")
+        logger.error("SocketIO error: %s", e)
         
     @socketio.on_error_default
     def default_error_handler(e):
-        print(f"SocketIO default error: {e}")
+        logger.error("SocketIO default error: %s", e)
     
-    def price_update_thread():
-        while True:
-            try:
-                with app.app_context():
-                    websocket_handler.send_price_updates(DEFAULT_SYMBOLS, socketio)
-                socketio.sleep(UPDATE_INTERVAL)
-            except Exception as e:
-                print(f"Error in price update thread: {e}")
-                socketio.sleep(5)
+    def broadcast_prices(due):
+        with app.app_context():
+            websocket_handler.send_price_updates(DEFAULT_SYMBOLS, socketio, due)
+    
+    bus = create_message_bus(MESSAGE_BUS_URL)
+    if bus.shared:
+        # one worker produces prices for all of them, the others only broadcast
+        election = create_producer_election(bus)
+        # hand the lease over at shutdown instead of leaving standbys to wait for it to expire
+        atexit.register(election.release)
+        websocket_handler.attach_bus(bus, socketio, is_producer=False, election=election)
+
+        def producer_election():
+            # renews the producer's lease and lets standbys take over when it lapses
+            while True:
+                if election.try_acquire():
+                    if not websocket_handler.is_producer:
+                        websocket_handler.become_producer()
+                elif websocket_handler.is_producer:
+                    websocket_handler.step_down()
+                socketio.sleep(PRODUCER_ELECTION_INTERVAL)
+
+        socketio.start_background_task(producer_election)
     
     if not DEBUG:
-        thread = threading.Thread(target=price_update_thread)
-        thread.daemon = True
-        thread.start()
+        # runs on the same scheduler as the per-symbol price jobs
+        websocket_handler.scheduler.add_job('broadcast', UPDATE_INTERVAL, broadcast_prices)
+        websocket_handler.scheduler.start(socketio)
+    
+    if INGESTION_ENABLED:
+        ingestion = IngestionService(crypto_service, sleep_fn=socketio.sleep)
+        socketio.start_background_task(ingestion.run)
     
     return app, socketio 
\ No newline at end of file
@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional
+from app.config.settings import MAX_CLIENT_UPDATE_RATE
+from app.api.wire_format import BinaryPriceEncoder
+
+
+class ClientStream:
+    """Delivery state for a client that asked for batching, a rate limit or binary frames.
+
+    Updates are coalesced per symbol (latest wins) until the client's next
+    send slot, then flushed together.
+    """
+
+    __slots__ = ('sid', 'symbols', 'batch', 'encoder', 'indicators', 'min_interval', 'next_send_at', 'pending')
+
+    def __init__(self, sid: str, symbols: List[str], batch: bool = False, max_rate: Optional[float] = None,
+                 encoder: Optional[BinaryPriceEncoder] = None, indicators: bool = False):
+        self.sid = sid
+        self.symbols = set(symbols)
+        self.batch = batch
+        self.encoder = encoder
+        self.indicators = indicators
+        rate = min(float(max_rate), MAX_CLIENT_UPDATE_RATE) if max_rate else None
+        self.min_interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.next_send_at = 0.0
+        self.pending: Dict[str, Dict] = {}
+
+    def wants(self, symbol: str) -> bool:
+        return not self.symbols or symbol in self.symbols
+
+    def offer(self, updates: List[Dict]) -> None:
+        for update in updates:
+            if self.wants(update['symbol']):
+                self.pending[update['symbol']] = update
+
+    def take_due(self, now: float) -> List[Dict]:
+        """Pending updates if the client's send slot has come, otherwise nothing"""
+        if not self.pending or now < self.next_send_at:
+            return []
+        updates = list(self.pending.values())
+        self.pending.clear()
+        self.next_send_at = now + self.min_interval
+        return updates
+
+
+def _optional_int(value) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_subscription(payload) -> Dict:
+    """Normalize a subscribe payload.
+
+    Accepts a coin id, a list of coin ids, or a dict with `symbols` and the
+    optional delivery settings `batch`, `max_rate` (updates per second),
+    `encoding` ('json' or 'binary') and `indicators` (also send the
+    streaming indicator values). `replay_since_seq` or `replay_since` (a
+    timestamp in ms) ask for the buffered ticks after that point.
+    """
+    if isinstance(payload, dict):
+        symbols = payload.get('symbols') or []
+        options = payload
+    else:
+        symbols = payload or []
+        options = {}
+    if isinstance(symbols, str):
+        symbols = [symbols]
+    return {
+        'symbols': list(symbols),
+        'batch': bool(options.get('batch', False)),
+        'max_rate': options.get('max_rate'),
+        'encoding': 'binary' if options.get('encoding') == 'binary' else 'json',
+        'indicators': bool(options.get('indicators', False)),
+        'replay_since_seq': _optional_int(options.get('replay_since_seq')),
+        'replay_since': _optional_int(options.get('replay_since'))
+    }
@@ -0,0 +1,62 @@
+from flask import Blueprint, current_app, jsonify, request
+import time
+from app.services.metrics import registry
+from app.services.profiler import profiler
+from app.config.settings import METRICS_PATH, PROFILER_ENABLED, PROFILER_MAX_SECONDS
+
+diagnostics = Blueprint('diagnostics', __name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+@diagnostics.route(METRICS_PATH)
+def metrics():
+    return current_app.response_class(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@diagnostics.before_request
+def require_profiler_enabled():
+    if request.path.startswith('/debug/profiler') and not PROFILER_ENABLED:
+        return jsonify({"error": "Profiler is disabled, set PROFILER_ENABLED=1 to enable it"}), 404
+
+def profile_report():
+    """Collapsed stacks as text (for flame graphs), or a JSON summary with ?format=json"""
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'running': profiler.running,
+            'samples': profiler.samples,
+            'started_at': profiler.started_at,
+            'stopped_at': profiler.stopped_at,
+            'top': [{'frame': frame, 'samples': count} for frame, count in profiler.top()]
+        })
+    return current_app.response_class(profiler.collapsed(), mimetype='text/plain')
+
+@diagnostics.route('/debug/profiler/start', methods=['POST'])
+def start_profiler():
+    started = profiler.start()
+    return jsonify({'running': True, 'started': started})
+
+@diagnostics.route('/debug/profiler/stop', methods=['POST'])
+def stop_profiler():
+    profiler.stop()
+    return profile_report()
+
+@diagnostics.route('/debug/profiler')
+def profiler_report():
+    return profile_report()
+
+@diagnostics.route('/debug/profiler/profile')
+def one_shot_profile():
+    """Sample for ?seconds= (default 5) and return the report"""
+    try:
+        seconds = min(float(request.args.get('seconds', 5)), PROFILER_MAX_SECONDS)
+    except ValueError:
+        return jsonify({"error": "seconds must be a number"}), 400
+    # also rejects nan, which min() passes through
+    if not seconds > 0:
+        return jsonify({"error": "seconds must be a positive number"}), 400
+    if not profiler.start():
+        return jsonify({"error": "Profiler is already running"}), 409
+    try:
+        time.sleep(seconds)
+    finally:
+        profiler.stop()
+    return profile_report()
@@ -1,9 +1,156 @@
-from flask import Blueprint, jsonify, request
-from app.services.stock_service import CryptoService
-from app.config.settings import DEFAULT_SYMBOLS, DEFAULT_SYMBOL, DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_INTERVAL
+from flask import Blueprint, current_app, g, jsonify, request
+from functools import partial
+import logging
+import time
+from app.services.stock_service import crypto_service
+from app.api.response_cache import ResponseCache, make_etag
+from app.services.metrics import registry, HTTP_REQUEST_SECONDS, KLINES_PHASE_SECONDS
+from app.utils.date_utils import date_range_to_timestamps
+from app.utils.data_utils import iter_kline_rows, kline_columnar, encode_kline_binary
+from app.utils.indicator_utils import parse_indicators
+from app.config.settings import (
+    DEFAULT_SYMBOLS, DEFAULT_SYMBOL, DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_INTERVAL,
+    RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_ENTRY_BYTES, CACHE_MAX_AGE, CLOSED_WINDOW_CACHE_MAX_AGE,
+    STREAM_CHUNK_SIZE, BATCH_MAX_SYMBOLS, MAX_INDICATORS_PER_REQUEST, CATALOG_DEFAULT_PAGE_SIZE,
+    CATALOG_MAX_PAGE_SIZE
+)
+
+CATALOG_PARAMS = ('q', 'sort', 'order', 'limit', 'cursor')
+
+logger = logging.getLogger(__name__)
 
 api = Blueprint('api', __name__)
-crypto_service = CryptoService()
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_ENTRY_BYTES)
+
+registry.gauge('besttrade_response_cache_bytes', 'Size of the cached response bodies',
+               function=lambda: response_cache.size)
+registry.counter('besttrade_response_cache_lookups_total', 'Response cache lookups by result', ('result',),
+                 function=lambda: {'hit': response_cache.hits, 'miss': response_cache.misses})
+
+@api.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@api.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(request.endpoint, response.status_code).observe(time.perf_counter() - started)
+    return response
+
+@api.before_request
+def reload_data():
+    if crypto_service.reload_if_changed():
+        response_cache.clear()
+
+def set_cache_headers(response, etag, max_age):
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+def compact_dumps():
+    """The app's JSON dumps without whitespace, as jsonify produces outside debug mode.
+
+    Bound to the current app, so streamed bodies can use it after the request context is gone.
+    """
+    return partial(current_app.json.dumps, separators=(',', ':'))
+
+def cached_response(key, build, max_age, serialize=None, mimetype='application/json', phases=None):
+    """Serve a body from the response cache with ETag/304 handling.
+
+    `build` returns (payload, status); only 200 responses are cached. Payloads
+    are serialized as JSON unless `serialize` turns them into bytes. With a
+    `phases` histogram the serialization time is recorded as its `serialize` phase.
+    """
+    etag = make_etag(key)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        body = response_cache.get(key)
+        if body is None:
+            payload, status = build()
+            if status != 200:
+                return jsonify(payload), status
+            started = time.perf_counter()
+            body = serialize(payload) if serialize else compact_dumps()(payload).encode('utf-8')
+            if phases is not None:
+                phases.labels('serialize').observe(time.perf_counter() - started)
+            response_cache.put(key, body)
+        response = current_app.response_class(body, mimetype=mimetype)
+    return set_cache_headers(response, etag, max_age)
+
+def requested_klines_format():
+    """'rows' (default), 'columnar' or 'binary'"""
+    klines_format = request.args.get('format', '').lower()
+    if klines_format in ('columnar', 'binary'):
+        return klines_format
+    if request.accept_mimetypes.best == 'application/octet-stream':
+        return 'binary'
+    return 'rows'
+
+def compact_klines_response(klines_format, key, max_age, coin_id, start_date, end_date, interval, indicators=None):
+    """Columns as JSON arrays, or packed little-endian buffers for `binary`"""
+    def build():
+        result = crypto_service.get_kline_columns(coin_id, start_date, end_date, interval, indicators)
+        if result['columns'] is None:
+            return {'error': result['info']['error'], 'info': result['info']}, 400
+        return result, 200
+
+    if klines_format == 'binary':
+        return cached_response(
+            key + ('binary',), build, max_age,
+            serialize=lambda result: encode_kline_binary(result['columns'], result['coin_info'], result['info']),
+            mimetype='application/octet-stream', phases=KLINES_PHASE_SECONDS
+        )
+    return cached_response(
+        key + ('columnar',), build, max_age,
+        serialize=lambda result: compact_dumps()(
+            kline_columnar(result['columns'], result['coin_info'], result['info'])).encode('utf-8'),
+        phases=KLINES_PHASE_SECONDS
+    )
+
+def requested_stream_format():
+    """'ndjson' or 'json' when the client asked for a streamed klines response"""
+    stream = request.args.get('stream', '').lower()
+    if stream == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson':
+        return 'ndjson'
+    if stream in ('1', 'true', 'json'):
+        return 'json'
+    return None
+
+def generate_json_klines(result, dumps):
+    """Chunked JSON array with the same shape as the buffered response"""
+    yield '{"data":['
+    separator = ''
+    for chunk in iter_kline_rows(result['columns'], result['coin_info'], STREAM_CHUNK_SIZE):
+        yield separator + ','.join(dumps(row) for row in chunk)
+        separator = ','
+    yield '],"info":' + dumps(result['info']) + '}'
+
+def generate_ndjson_klines(result, dumps):
+    """One row per line; the request info travels in X-Klines-* headers"""
+    for chunk in iter_kline_rows(result['columns'], result['coin_info'], STREAM_CHUNK_SIZE):
+        yield ''.join(dumps(row) + '\n' for row in chunk)
+
+def streamed_klines_response(stream_format, key, max_age, coin_id, start_date, end_date, interval, indicators=None):
+    etag = make_etag(key + (stream_format,))
+    if request.if_none_match.contains(etag):
+        return set_cache_headers(current_app.response_class(status=304), etag, max_age)
+
+    result = crypto_service.get_kline_columns(coin_id, start_date, end_date, interval, indicators)
+    if result['columns'] is None:
+        return jsonify({'error': result['info']['error'], 'info': result['info']}), 400
+
+    dumps = compact_dumps()
+    if stream_format == 'ndjson':
+        response = current_app.response_class(generate_ndjson_klines(result, dumps), mimetype='application/x-ndjson')
+        for name, value in result['info'].items():
+            if value is not None:
+                response.headers[f"X-Klines-{name.replace('_', '-').title()}"] = str(value)
+    else:
+        response = current_app.response_class(generate_json_klines(result, dumps), mimetype='application/json')
+    return set_cache_headers(response, etag, max_age)
 
 @api.route('/')
 def root():
@@ -13,37 +160,139 @@ def root():
 def health_check():
     return jsonify({"status": "healthy"})
 
+def catalog_response():
+    """Search and ranked, cursor-paginated listing over the symbol catalog"""
+    query = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'market_cap')
+    order = request.args.get('order', 'desc').lower()
+    cursor = request.args.get('cursor') or None
+    try:
+        limit = int(request.args.get('limit', CATALOG_DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= CATALOG_MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {CATALOG_MAX_PAGE_SIZE}"}), 400
+    if order not in ('asc', 'desc'):
+        return jsonify({"error": "order must be asc or desc"}), 400
+
+    catalog = crypto_service.get_catalog()
+
+    def build():
+        try:
+            return catalog.page(query, sort, order == 'desc', limit, cursor), 200
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+    key = ('symbols_catalog', catalog.version, query.lower(), sort, order, limit, cursor)
+    return cached_response(key, build, CACHE_MAX_AGE)
+
 @api.route('/symbols')
 def get_symbols():
     try:
-        symbols_data = crypto_service.get_symbols_data(DEFAULT_SYMBOLS)
-        return jsonify(symbols_data)
+        if any(param in request.args for param in CATALOG_PARAMS):
+            return catalog_response()
+        key = ('symbols', tuple(DEFAULT_SYMBOLS), crypto_service.data_version())
+        return cached_response(
+            key, lambda: (crypto_service.get_symbols_data(DEFAULT_SYMBOLS), 200), CACHE_MAX_AGE
+        )
     except Exception as e:
-        print(f"Error in get_symbols: {e}")
+        logger.error("Error in get_symbols: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @api.route('/klines')
 def get_klines():
     try:
+        validate_started = time.perf_counter()
         coin_id = request.args.get('symbol', DEFAULT_SYMBOL)
         interval = request.args.get('interval', DEFAULT_INTERVAL)
         start_date = request.args.get('start_date', DEFAULT_START_DATE)
         end_date = request.args.get('end_date', DEFAULT_END_DATE)
+        try:
+            indicators = parse_indicators(request.args.get('indicators'), MAX_INDICATORS_PER_REQUEST)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            end_ms = date_range_to_timestamps(start_date, end_date)[1]
+        except ValueError:
+            end_ms = None
+        version = crypto_service.data_version(coin_id, end_ms)
+        closed = crypto_service.is_window_closed(coin_id, end_ms)
+        max_age = CLOSED_WINDOW_CACHE_MAX_AGE if closed else CACHE_MAX_AGE
+        key = ('klines', coin_id, interval, start_date, end_date, tuple(indicators), version)
+        KLINES_PHASE_SECONDS.labels('validate').observe(time.perf_counter() - validate_started)
+
+        klines_format = requested_klines_format()
+        if klines_format != 'rows':
+            return compact_klines_response(klines_format, key, max_age, coin_id, start_date, end_date, interval,
+                                           indicators)
+
+        stream_format = requested_stream_format()
+        if stream_format:
+            return streamed_klines_response(stream_format, key, max_age, coin_id, start_date, end_date, interval,
+                                            indicators)
         
-        result = crypto_service.get_historical_data(
-            coin_id=coin_id,
-            start_date=start_date,
-            end_date=end_date,
-            interval=interval
-        )
-        
-        if result.get('info', {}).get('error'):
-            return jsonify({
-                'error': result['info']['error'],
-                'info': result['info']
-            }), 400
+        def build():
+            result = crypto_service.get_historical_data(
+                coin_id=coin_id,
+                start_date=start_date,
+                end_date=end_date,
+                interval=interval,
+                indicators=indicators
+            )
             
-        return jsonify(result)
+            if result.get('info', {}).get('error'):
+                return {
+                    'error': result['info']['error'],
+                    'info': result['info']
+                }, 400
+                
+            return result, 200
+
+        return cached_response(key, build, max_age, phases=KLINES_PHASE_SECONDS)
     except Exception as e:
-        print(f"Error in get_klines for {coin_id}: {e}")
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        logger.error("Error in get_klines for %s: %s", coin_id, e)
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/klines/batch')
+def get_klines_batch():
+    try:
+        symbols = request.args.get('symbols')
+        coin_ids = list(dict.fromkeys(s.strip() for s in symbols.split(',') if s.strip())) if symbols else list(DEFAULT_SYMBOLS)
+        interval = request.args.get('interval', DEFAULT_INTERVAL)
+        start_date = request.args.get('start_date', DEFAULT_START_DATE)
+        end_date = request.args.get('end_date', DEFAULT_END_DATE)
+        if len(coin_ids) > BATCH_MAX_SYMBOLS:
+            return jsonify({"error": f"At most {BATCH_MAX_SYMBOLS} symbols per batch"}), 400
+        try:
+            indicators = parse_indicators(request.args.get('indicators'), MAX_INDICATORS_PER_REQUEST)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            end_ms = date_range_to_timestamps(start_date, end_date)[1]
+        except ValueError:
+            end_ms = None
+        versions = tuple(crypto_service.data_version(coin_id, end_ms) for coin_id in coin_ids)
+        closed = all(crypto_service.is_window_closed(coin_id, end_ms) for coin_id in coin_ids)
+        max_age = CLOSED_WINDOW_CACHE_MAX_AGE if closed else CACHE_MAX_AGE
+        klines_format = requested_klines_format()
+        if klines_format == 'binary':
+            return jsonify({"error": "binary is not supported for batch"}), 400
+        columnar = klines_format == 'columnar'
+        key = ('klines_batch', tuple(coin_ids), interval, start_date, end_date, columnar, tuple(indicators), versions)
+
+        def build():
+            formatter = None
+            if columnar:
+                formatter = lambda result: kline_columnar(result['columns'], result['coin_info'], result['info'])
+            result = crypto_service.get_historical_data_batch(coin_ids, start_date, end_date, interval, formatter,
+                                                              indicators)
+            if result['info'].get('error'):
+                return {'error': result['info']['error'], 'info': result['info']}, 400
+            return result, 200
+
+        return cached_response(key, build, max_age)
+    except Exception as e:
+        logger.error("Error in get_klines_batch: %s", e)
+        return jsonify({"error": str(e)}), 500
@@ -10,24 +10,94 @@ def get_swagger_spec():
             "/api/symbols": {
                 "get": {
                     "summary": "Get available cryptocurrency symbols",
-                    "description": "Returns a list of popular cryptocurrency symbols and their current prices",
+                    "description": "Without parameters, returns a list of popular cryptocurrency symbols and their current prices. With any of q, sort, order, limit or cursor, searches and ranks the full symbol catalog and returns one page of coins with metadata.",
+                    "parameters": [
+                        {
+                            "name": "q",
+                            "in": "query",
+                            "description": "Search text matched against the start of an id, symbol, name or name word, or from 3 characters anywhere in them",
+                            "required": False,
+                            "schema": {"type": "string"}
+                        },
+                        {
+                            "name": "sort",
+                            "in": "query",
+                            "description": "Ranking: market_cap, change_24h or volume",
+                            "required": False,
+                            "schema": {"type": "string", "default": "market_cap"}
+                        },
+                        {
+                            "name": "order",
+                            "in": "query",
+                            "description": "desc or asc; coins without a value are listed last",
+                            "required": False,
+                            "schema": {"type": "string", "default": "desc"}
+                        },
+                        {
+                            "name": "limit",
+                            "in": "query",
+                            "description": "Page size (1-250)",
+                            "required": False,
+                            "schema": {"type": "integer", "default": 50}
+                        },
+                        {
+                            "name": "cursor",
+                            "in": "query",
+                            "description": "next_cursor of the previous page",
+                            "required": False,
+                            "schema": {"type": "string"}
+                        }
+                    ],
                     "responses": {
                         "200": {
-                            "description": "List of symbols",
+                            "description": "List of symbols, or a page of the catalog when searching or ranking",
                             "content": {
                                 "application/json": {
                                     "schema": {
-                                        "type": "array",
-                                        "items": {
-                                            "type": "object",
-                                            "properties": {
-                                                "symbol": {"type": "string"},
-                                                "price": {"type": "string"}
+                                        "oneOf": [
+                                            {
+                                                "type": "array",
+                                                "items": {
+                                                    "type": "object",
+                                                    "properties": {
+                                                        "symbol": {"type": "string"},
+                                                        "price": {"type": "string"}
+                                                    }
+                                                }
+                                            },
+                                            {
+                                                "type": "object",
+                                                "properties": {
+                                                    "data": {
+                                                        "type": "array",
+                                                        "items": {
+                                                            "type": "object",
+                                                            "properties": {
+                                                                "id": {"type": "string"},
+                                                                "symbol": {"type": "string"},
+                                                                "name": {"type": "string"},
+                                                                "market_cap_rank": {"type": "integer"},
+                                                                "price": {"type": "number"},
+                                                                "market_cap": {"type": "number"},
+                                                                "volume_24h": {"type": "number"},
+                                                                "change_24h": {"type": "number"},
+                                                                "total_supply": {"type": "number"},
+                                                                "max_supply": {"type": "number"},
+                                                                "circulating_supply": {"type": "number"}
+                                                            }
+                                                        }
+                                                    },
+                                                    "total": {"type": "integer"},
+                                                    "next_cursor": {"type": "string", "nullable": True}
+                                                }
                                             }
-                                        }
+                                        ]
                                     }
                                 }
                             }
+                        },
+                        "400": {
+                            "description": "Invalid sort, order, limit or cursor"
                         }
                     }
                 }
@@ -35,7 +105,7 @@ def get_swagger_spec():
             "/api/klines": {
                 "get": {
                     "summary": "Get historical cryptocurrency data",
-                    "description": "Returns historical data for a cryptocurrency with additional market information. Limited to last 365 days for free API users.",
+                    "description": "Returns historical data for a cryptocurrency with additional market information. Ranges are limited to 365 days, or 10 years when served from the local history store.",
                     "parameters": [
                         {
                             "name": "symbol",
@@ -50,7 +120,7 @@ def get_swagger_spec():
                         {
                             "name": "interval",
                             "in": "query",
-                            "description": "Time interval (daily only)",
+                            "description": "Candle interval: 1m, 5m, 15m, 1h, 4h, 1d, 1w (aliases: minute, hourly, daily, weekly)",
                             "required": False,
                             "schema": {
                                 "type": "string",
@@ -60,7 +130,7 @@ def get_swagger_spec():
                         {
                             "name": "start_date",
                             "in": "query",
-                            "description": "Start date (YYYY-MM-DD). Will be adjusted if exceeds 365 days from end date.",
+                            "description": "Start date (YYYY-MM-DD). Will be adjusted if the range exceeds the maximum allowed.",
                             "required": False,
                             "schema": {
                                 "type": "string",
@@ -76,6 +146,33 @@ def get_swagger_spec():
                                 "type": "string",
                                 "format": "date"
                             }
+                        },
+                        {
+                            "name": "stream",
+                            "in": "query",
+                            "description": "Stream the response in chunks: 'json' (same shape as the buffered response) or 'ndjson' (one row per line, also selected with Accept: application/x-ndjson)",
+                            "required": False,
+                            "schema": {
+                                "type": "string",
+                                "enum": ["json", "ndjson"]
+                            }
+                        },
+                        {
+                            "name": "format",
+                            "in": "query",
+                            "description": "Compact payloads: 'columnar' (one array per field, coin metadata under 'meta') or 'binary' (application/octet-stream: 'BTKL', uint8 version, 3 pad bytes, uint32 header length, JSON header with field names/dtypes/offsets, then 8-byte aligned little-endian int64/float64 columns)",
+                            "required": False,
+                            "schema": {
+                                "type": "string",
+                                "enum": ["rows", "columnar", "binary"]
+                            }
+                        },
+                        {
+                            "name": "indicators",
+                            "in": "query",
+                            "description": "Comma separated indicators added as extra columns (null during warm-up): sma:n, ema:n, rsi:n, macd:fast:slow:signal, bb:n:k, vwap (UTC-day anchored) or vwap:n (rolling). E.g. 'sma:20,rsi:14,macd:12:26:9' adds sma_20, rsi_14, macd_12_26_9, macd_signal_12_26_9 and macd_hist_12_26_9",
+                            "required": False,
+                            "schema": {"type": "string"}
                         }
                     ],
                     "responses": {
@@ -94,6 +191,10 @@ def get_swagger_spec():
                                                         "time": {"type": "number"},
                                                         "trading_date": {"type": "string"},
                                                         "price": {"type": "number"},
+                                                        "open": {"type": "number"},
+                                                        "high": {"type": "number"},
+                                                        "low": {"type": "number"},
+                                                        "close": {"type": "number"},
                                                         "volume": {"type": "number"},
                                                         "market_cap": {"type": "number"},
                                                         "change": {"type": "number"},
@@ -116,6 +217,7 @@ def get_swagger_spec():
                                                 "properties": {
                                                     "start_date": {"type": "string"},
                                                     "end_date": {"type": "string"},
+                                                    "interval": {"type": "string"},
                                                     "message": {"type": "string"}
                                                 }
                                             }
@@ -147,6 +249,78 @@ def get_swagger_spec():
                         }
                     }
                 }
+            },
+            "/api/klines/batch": {
+                "get": {
+                    "summary": "Get historical data for several cryptocurrencies",
+                    "description": "Returns /api/klines results for many symbols over one shared window and interval in a single response. Symbols that fail carry an error entry instead of failing the batch.",
+                    "parameters": [
+                        {
+                            "name": "symbols",
+                            "in": "query",
+                            "description": "Comma separated cryptocurrency IDs (default: all default symbols, at most 50)",
+                            "required": False,
+                            "schema": {"type": "string"}
+                        },
+                        {
+                            "name": "interval",
+                            "in": "query",
+                            "description": "Candle interval, as for /api/klines",
+                            "required": False,
+                            "schema": {"type": "string", "default": "daily"}
+                        },
+                        {
+                            "name": "start_date",
+                            "in": "query",
+                            "description": "Start date (YYYY-MM-DD)",
+                            "required": False,
+                            "schema": {"type": "string"}
+                        },
+                        {
+                            "name": "end_date",
+                            "in": "query",
+                            "description": "End date (YYYY-MM-DD)",
+                            "required": False,
+                            "schema": {"type": "string", "format": "date"}
+                        },
+                        {
+                            "name": "format",
+                            "in": "query",
+                            "description": "'columnar' to return each symbol as arrays of columns",
+                            "required": False,
+                            "schema": {"type": "string", "enum": ["rows", "columnar"]}
+                        },
+                        {
+                            "name": "indicators",
+                            "in": "query",
+                            "description": "Indicators added to every symbol, as for /api/klines",
+                            "required": False,
+                            "schema": {"type": "string"}
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Per-symbol results keyed by symbol, plus the shared request info",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "object",
+                                        "properties": {
+                                            "results": {
+                                                "type": "object",
+                                                "additionalProperties": {"type": "object"}
+                                            },
+                                            "info": {"type": "object"}
+                                        }
+                                    }
+                                }
+                            }
+                        },
+                        "400": {
+                            "description": "Too many symbols or unsupported interval"
+                        }
+                    }
+                }
             }
         }
     } 
\ No newline at end of file
@@ -1,147 +1,452 @@
 from flask_socketio import emit
-from app.services.stock_service import CryptoService
-from app.config.settings import PRICE_UPDATE_INTERVAL
+from app.services.stock_service import crypto_service
+from app.services.streaming_indicators import StreamingIndicators
+from app.services.tick_buffer import TickRingBuffer, merge_replay
+from app.services.message_bus import InProcessBus
+from app.services.metrics import registry, SOCKET_EVENTS, TICK_EMITS
+from app.services.tick_scheduler import TickScheduler
+from app.services.price_feed import create_price_feed
+from app.config.settings import (
+    PRICE_UPDATE_INTERVAL, SYMBOL_TICK_INTERVALS, STREAMING_INDICATOR_WARMUP, PRICE_CHANNEL
+)
+from app.api.client_stream import ClientStream, parse_subscription
+from app.api.wire_format import BinaryPriceEncoder
+from app.utils.data_utils import round_price
+import logging
 import time
 import threading
-import random
 from datetime import datetime, timedelta
 
+SYMBOL_ROOM_PREFIX = 'price:'
+ALL_SYMBOLS_ROOM = 'price:*'
+INDICATOR_ROOM_PREFIX = 'indicators:'
+ALL_INDICATORS_ROOM = 'indicators:*'
+# scheduler job ticking subscribed symbols; symbols with their own cadence get 'prices:<symbol>'
+PRICE_JOB = 'prices'
+
+logger = logging.getLogger(__name__)
+
 class WebSocketHandler:
     def __init__(self):
         self.clients = set()
-        self.crypto_service = CryptoService()
+        self.crypto_service = crypto_service
         self.subscriptions = {}
-        self.polling_thread = None
+        self.symbol_subscribers = {}
+        self.client_streams = {}
+        self.indicator_clients = set()
+        self.lock = threading.RLock()
+        self.scheduler = TickScheduler()
         self.is_polling = False
         self.socketio = None
-        self.last_prices = {
-            'bitcoin': 65000,
-            'ethereum': 3500
-        }
-        sample_data = self.crypto_service.sample_data
-        self.current_timestamp = self._get_last_timestamp(sample_data)
-        self.update_count = 0
+        self.feed = create_price_feed(sample_data=self.crypto_service.sample_data, store=self.crypto_service.store)
+        self.last_prices = self.feed.initial_prices()
+        self.indicators = {}
+        self.last_indicators = {}
+        self.tick_seq = 0
+        self.tick_buffers = {}
+        self.current_timestamp = self._get_last_timestamp(self.crypto_service.store)
+        # simulated tick time advances with the scheduler's deadlines from this monotonic origin
+        self.clock_origin = time.monotonic() - PRICE_UPDATE_INTERVAL
+        self.last_tick_timestamp = self.current_timestamp
+        self.produced_timestamp = self.current_timestamp
+        self.produced_seq = 0
+        self.is_producer = True
+        self.election = None
+        self.bus = InProcessBus()
+        self.bus.subscribe(PRICE_CHANNEL, self._on_price_message)
+
+    def attach_bus(self, bus, socketio=None, is_producer=False, election=None):
+        """Receive ticks from a shared bus; only the elected producer generates them.
+
+        With an `election`, ticks are only generated while it still reports
+        this worker as leader, even between two checks of the election loop.
+        """
+        with self.lock:
+            if socketio:
+                self.socketio = socketio
+            self.bus = bus
+            self.is_producer = is_producer
+            self.election = election
+        bus.subscribe(PRICE_CHANNEL, self._on_price_message)
+
+    def become_producer(self):
+        """Take over tick generation, continuing from the last tick this worker delivered"""
+        with self.lock:
+            self._restart_clock()
+            self.feed.sync(self.last_prices)
+            self.produced_seq = self.tick_seq
+            self.is_producer = True
+        logger.info("Price producer elected in this worker")
+        self.start_polling()
 
-    def _get_last_timestamp(self, sample_data):
+    def step_down(self):
+        """Stop generating ticks after losing the election; keep delivering the new producer's"""
+        with self.lock:
+            self.is_producer = False
+        logger.warning("Price producer lease lost, this worker is standing by")
+        self.stop_polling()
+
+    def _get_last_timestamp(self, store):
         try:
-            bitcoin_data = sample_data['historical']['bitcoin']['prices']
-            last_ts = int(bitcoin_data[-1][0])
+            last_ts = int(store.get('bitcoin').timestamps[-1])
             return last_ts
         except:
             now = datetime.now()
             return int(now.timestamp() * 1000)
 
-    def _generate_price_update(self, symbol):
-        current_price = self.last_prices[symbol]
-        change_percent = random.uniform(-0.5, 0.5)
-        new_price = current_price * (1 + change_percent / 100)
-        self.last_prices[symbol] = new_price
-        
-        self.update_count += 1
-        new_timestamp = self.current_timestamp + (self.update_count * PRICE_UPDATE_INTERVAL * 1000)
+    def _symbol_room(self, symbol):
+        return f"{SYMBOL_ROOM_PREFIX}{symbol}"
+
+    def _indicator_room(self, symbol):
+        return f"{INDICATOR_ROOM_PREFIX}{symbol}"
+
+    def _indicator_state(self, symbol):
+        """Streaming indicators of a symbol, warmed up from its stored prices on first use"""
+        state = self.indicators.get(symbol)
+        if state is None:
+            state = self.indicators[symbol] = StreamingIndicators()
+            series = self.crypto_service.store.get(symbol)
+            if series is not None:
+                for price in series.prices[-STREAMING_INDICATOR_WARMUP:].tolist():
+                    self.last_indicators[symbol] = state.update(price)
+        return state
+
+    def _indicator_update(self, symbol, timestamp):
+        if symbol not in self.last_indicators:
+            self.last_indicators[symbol] = self._indicator_state(symbol).values()
+        return {
+            'symbol': symbol,
+            'timestamp': timestamp,
+            'indicators': self.last_indicators[symbol]
+        }
+
+    def _restart_clock(self):
+        """Continue simulated time one interval after the last delivered tick"""
+        self.current_timestamp = self.last_tick_timestamp
+        self.produced_timestamp = self.last_tick_timestamp
+        self.clock_origin = time.monotonic() - PRICE_UPDATE_INTERVAL
+
+    def _next_tick_timestamp(self, due=None):
+        """Simulated timestamp of a tick scheduled for the monotonic deadline `due` (default now)"""
+        elapsed = (time.monotonic() if due is None else due) - self.clock_origin
+        # never behind a tick already produced, when jobs of different cadences interleave
+        self.produced_timestamp = max(self.produced_timestamp, self.current_timestamp + int(round(elapsed * 1000)))
+        return self.produced_timestamp
+
+    def _record_tick(self, symbol, timestamp, price, seq, synthetic=True):
+        """Apply a published tick to this worker's prices, indicators and replay buffer.
+
+        Synthetic ticks (simulated or replayed) stay in the bounded per-symbol
+        ring buffers; only ticks of a real price feed are added to the
+        service's history and rollups, so /api/klines keeps serving real candles.
+        """
+        self.last_prices[symbol] = price
+        self.last_indicators[symbol] = self._indicator_state(symbol).update(price)
+        if not synthetic:
+            self.crypto_service.ingest_tick(symbol, timestamp, price)
+        self.tick_seq = max(self.tick_seq, seq)
+        self.last_tick_timestamp = max(self.last_tick_timestamp, timestamp)
+        buffer = self.tick_buffers.get(symbol)
+        if buffer is None:
+            buffer = self.tick_buffers[symbol] = TickRingBuffer()
+        buffer.append(seq, timestamp, price)
         
         return {
             'symbol': symbol,
-            'price': round(new_price, 2),
-            'timestamp': new_timestamp
+            'price': round_price(price),
+            'timestamp': timestamp,
+            'seq': seq
+        }
+
+    def _current_timestamp(self):
+        return self.last_tick_timestamp
+
+    def _current_price_update(self, symbol):
+        return {
+            'symbol': symbol,
+            'price': round_price(self.last_prices[symbol]),
+            'timestamp': self._current_timestamp()
+        }
+
+    def _replay_frame(self, symbols, since_seq=None, since_timestamp=None):
+        """Buffered ticks after a sequence number or timestamp, merged into one frame"""
+        ticks = {}
+        complete = True
+        for symbol in symbols:
+            buffer = self.tick_buffers.get(symbol)
+            if buffer is None:
+                continue
+            ticks[symbol] = buffer.since(since_seq, since_timestamp)
+            complete = complete and ticks[symbol]['complete']
+        return {
+            'updates': merge_replay(ticks),
+            'complete': complete,
+            'seq': self.tick_seq
         }
 
+    def _leave_symbol_rooms(self, sid):
+        for coin_id in self.subscriptions.get(sid, []):
+            subscribers = self.symbol_subscribers.get(coin_id)
+            if subscribers is not None:
+                subscribers.discard(sid)
+                if not subscribers:
+                    del self.symbol_subscribers[coin_id]
+            if self.socketio:
+                self.socketio.server.leave_room(sid, self._symbol_room(coin_id), namespace='/')
+            if self.socketio and sid in self.indicator_clients:
+                self.socketio.server.leave_room(sid, self._indicator_room(coin_id), namespace='/')
+        if self.socketio:
+            self.socketio.server.leave_room(sid, ALL_SYMBOLS_ROOM, namespace='/')
+            if sid in self.indicator_clients:
+                self.socketio.server.leave_room(sid, ALL_INDICATORS_ROOM, namespace='/')
+        self.indicator_clients.discard(sid)
+        self.client_streams.pop(sid, None)
+
     def handle_connect(self, sid, socketio=None):
         if socketio:
             self.socketio = socketio
             
-        self.clients.add(sid)
-        self.subscriptions[sid] = []
-        print(f"Client connected: {sid}")
-        
-        self.update_count = 0
-        
-        if not self.is_polling:
+        with self.lock:
+            self.clients.add(sid)
+            self.subscriptions[sid] = []
+        if self.socketio:
+            # clients without a subscription receive every broadcast symbol
+            self.socketio.server.enter_room(sid, ALL_SYMBOLS_ROOM, namespace='/')
+        SOCKET_EVENTS.labels('connect').inc()
+        logger.debug("Client connected: %s", sid)
+
+        if self.is_producer and not self.is_polling:
             self.start_polling()
 
     def handle_disconnect(self, sid):
         try:
-            if sid in self.clients:
-                self.clients.remove(sid)
-            if sid in self.subscriptions:
-                del self.subscriptions[sid]
-            print(f"Client disconnected: {sid}")
-            
-            if not self.clients:
+            with self.lock:
+                self._leave_symbol_rooms(sid)
+                if sid in self.clients:
+                    self.clients.remove(sid)
+                if sid in self.subscriptions:
+                    del self.subscriptions[sid]
+            SOCKET_EVENTS.labels('disconnect').inc()
+            logger.debug("Client disconnected: %s", sid)
+
+            # with a shared bus the producer keeps ticking for the other workers
+            if not self.clients and not self.bus.shared:
                 self.stop_polling()
-                self.update_count = 0
         except Exception as e:
-            print(f"Error in disconnect handler: {e}")
+            logger.error("Error in disconnect handler: %s", e)
 
     def handle_subscribe(self, coin_ids, sid):
         try:
-            if isinstance(coin_ids, str):
-                coin_ids = [coin_ids]
-            
-            self.subscriptions[sid] = coin_ids
-            self.update_count = 0
+            SOCKET_EVENTS.labels('subscribe').inc()
+            subscription = parse_subscription(coin_ids)
+            coin_ids = subscription['symbols']
+            # batched or rate limited clients get their own coalesced stream instead of rooms
+            stream = None
+            if subscription['encoding'] == 'binary':
+                # ids are fixed at subscribe time, an empty subscription covers every known symbol
+                encoder = BinaryPriceEncoder(coin_ids or list(self.last_prices), self._current_timestamp())
+                stream = ClientStream(sid, coin_ids, True, subscription['max_rate'], encoder,
+                                      subscription['indicators'])
+            elif subscription['batch'] or subscription['max_rate']:
+                stream = ClientStream(sid, coin_ids, subscription['batch'], subscription['max_rate'],
+                                      indicators=subscription['indicators'])
+            with_indicators = subscription['indicators']
             
-            for coin_id in coin_ids:
-                if coin_id in self.last_prices:
-                    update = self._generate_price_update(coin_id)
-                    if self.socketio:
-                        self.socketio.emit('price_update', update, room=sid)
+            with self.lock:
+                self._leave_symbol_rooms(sid)
+                self.subscriptions[sid] = coin_ids
+                if with_indicators:
+                    self.indicator_clients.add(sid)
+                for coin_id in coin_ids:
+                    self.symbol_subscribers.setdefault(coin_id, set()).add(sid)
+                    if self.socketio and stream is None:
+                        self.socketio.server.enter_room(sid, self._symbol_room(coin_id), namespace='/')
+                        if with_indicators:
+                            self.socketio.server.enter_room(sid, self._indicator_room(coin_id), namespace='/')
+                if stream is not None:
+                    self.client_streams[sid] = stream
+                elif not coin_ids and self.socketio:
+                    self.socketio.server.enter_room(sid, ALL_SYMBOLS_ROOM, namespace='/')
+                    if with_indicators:
+                        self.socketio.server.enter_room(sid, ALL_INDICATORS_ROOM, namespace='/')
+
+                # current price only, the shared tick keeps moving it
+                updates = [self._current_price_update(coin_id) for coin_id in coin_ids if coin_id in self.last_prices]
+                replay = None
+                if subscription['replay_since_seq'] is not None or subscription['replay_since'] is not None:
+                    replay = self._replay_frame(coin_ids or list(self.tick_buffers),
+                                                subscription['replay_since_seq'], subscription['replay_since'])
+                indicator_updates = []
+                if with_indicators and stream is None:
+                    indicator_updates = [self._indicator_update(update['symbol'], update['timestamp'])
+                                         for update in updates]
+
+            if self.socketio:
+                if stream is not None and stream.encoder is not None:
+                    self.socketio.emit('subscribed', {
+                        'encoding': 'binary',
+                        'symbol_ids': stream.encoder.symbol_ids,
+                        'base_timestamp': stream.encoder.base_timestamp
+                    }, to=sid)
+                if replay is not None:
+                    self.socketio.emit('price_replay', replay, to=sid)
+                self._send_updates(sid, updates, stream)
+                for indicator_update in indicator_updates:
+                    self.socketio.emit('indicator_update', indicator_update, to=sid)
         except Exception as e:
-            print(f"Error in subscribe handler: {e}")
+            logger.error("Error in subscribe handler: %s", e)
+
+    def _send_updates(self, sid, updates, stream=None):
+        """Emit updates to one client, returning the number of emits"""
+        if not updates:
+            return 0
+        emits = 0
+        if stream is not None and stream.encoder is not None:
+            frame = stream.encoder.encode(updates)
+            if frame:
+                self.socketio.emit('price_binary', frame, to=sid)
+                emits += 1
+        elif stream is not None and stream.batch:
+            self.socketio.emit('price_batch', {'updates': updates}, to=sid)
+            emits += 1
+        else:
+            for update in updates:
+                self.socketio.emit('price_update', update, to=sid)
+            emits += len(updates)
+        if stream is not None and stream.indicators:
+            # latest values at send time, coalesced like the prices
+            with self.lock:
+                indicator_updates = [self._indicator_update(update['symbol'], update['timestamp'])
+                                     for update in updates]
+            self.socketio.emit('indicator_batch', {'updates': indicator_updates}, to=sid)
+            emits += 1
+        return emits
+
+    def _flush_client_streams(self, updates, include_unsubscribed=False):
+        now = time.monotonic()
+        with self.lock:
+            due = []
+            for stream in self.client_streams.values():
+                if stream.symbols or include_unsubscribed:
+                    stream.offer(updates)
+                pending = stream.take_due(now)
+                if pending:
+                    due.append((stream, pending))
+        return sum(self._send_updates(stream.sid, pending, stream) for stream, pending in due)
+
+    def _broadcast_tick(self, symbols, include_unsubscribed=False, due=None):
+        """Generate one tick for the symbols and publish it; every worker delivers it in _on_price_message"""
+        with self.lock:
+            if not self.is_producer or (self.election is not None and not self.election.is_leader):
+                return []
+            symbols = [symbol for symbol in symbols if symbol in self.last_prices]
+            if not symbols:
+                return []
+            timestamp = self._next_tick_timestamp(due)
+            # one feed call prices every symbol of the tick
+            prices = self.feed.next_prices(symbols, timestamp)
+            ticks = []
+            for symbol in symbols:
+                if symbol not in prices:
+                    continue
+                self.produced_seq += 1
+                ticks.append({
+                    'symbol': symbol,
+                    'price': prices[symbol],
+                    'timestamp': timestamp,
+                    'seq': self.produced_seq
+                })
+        if not ticks:
+            return []
+        self.bus.publish(PRICE_CHANNEL, {'ticks': ticks, 'include_unsubscribed': include_unsubscribed,
+                                         'synthetic': self.feed.synthetic})
+        return ticks
+
+    def _on_price_message(self, message):
+        """Record a published tick and emit it once to each symbol's room"""
+        # messages without the flag come from producers that only generated prices
+        synthetic = message.get('synthetic', True)
+        with self.lock:
+            updates = [self._record_tick(tick['symbol'], tick['timestamp'], tick['price'], tick['seq'], synthetic)
+                       for tick in message['ticks']]
+            indicator_updates = []
+            if self.indicator_clients:
+                indicator_updates = [self._indicator_update(update['symbol'], update['timestamp'])
+                                     for update in updates]
+        if not self.socketio:
+            return updates
+        include_unsubscribed = message.get('include_unsubscribed', False)
+
+        for update in updates:
+            rooms = [self._symbol_room(update['symbol'])]
+            if include_unsubscribed:
+                rooms.append(ALL_SYMBOLS_ROOM)
+            self.socketio.emit('price_update', update, to=rooms)
+        for indicator_update in indicator_updates:
+            rooms = [self._indicator_room(indicator_update['symbol'])]
+            if include_unsubscribed:
+                rooms.append(ALL_INDICATORS_ROOM)
+            self.socketio.emit('indicator_update', indicator_update, to=rooms)
+        emits = len(updates) + len(indicator_updates)
+        if self.client_streams:
+            emits += self._flush_client_streams(updates, include_unsubscribed)
+        TICK_EMITS.observe(emits)
+        return updates
 
     def start_polling(self):
+        """Register the price jobs on the tick scheduler and make sure it is running"""
         if not self.socketio:
-            print("Warning: No SocketIO instance available for polling")
+            logger.warning("No SocketIO instance available for polling")
             return
-            
-        self.is_polling = True
-        self.polling_thread = threading.Thread(target=self._poll_prices)
-        self.polling_thread.daemon = True
-        self.polling_thread.start()
+
+        with self.lock:
+            if self.is_polling:
+                return
+            self.is_polling = True
+            self._restart_clock()
+            now = time.monotonic()
+            self.scheduler.add_job(PRICE_JOB, PRICE_UPDATE_INTERVAL, self._tick_prices, now)
+            for symbol, interval in SYMBOL_TICK_INTERVALS.items():
+                self.scheduler.add_job(f"{PRICE_JOB}:{symbol}", interval,
+                                       lambda due, symbol=symbol: self._tick_prices(due, [symbol]), now)
+        self.scheduler.start(self.socketio)
 
     def stop_polling(self):
-        self.is_polling = False
-        if self.polling_thread:
-            self.polling_thread.join()
-            self.polling_thread = None
-
-    def _poll_prices(self):
-        while self.is_polling:
-            try:
-                all_coins = set()
-                for coins in self.subscriptions.values():
-                    all_coins.update(coins)
-                
-                if all_coins and self.socketio:
-                    for sid, subscribed_coins in self.subscriptions.items():
-                        for coin_id in subscribed_coins:
-                            if coin_id in self.last_prices:
-                                update = self._generate_price_update(coin_id)
-                                print(f"Sending update: {update}")
-                                self.socketio.emit('price_update', update, room=sid)
-            except Exception as e:
-                print(f"Error in price polling: {e}")
-            
-            time.sleep(PRICE_UPDATE_INTERVAL)
+        """Unregister the price jobs; never waits on a running tick, so it is safe inside event handlers"""
+        with self.lock:
+            self.is_polling = False
+            self.scheduler.remove_jobs(PRICE_JOB)
+            if not self.scheduler.jobs():
+                self.scheduler.stop()
 
-    def send_price_updates(self, default_symbols, socketio):
+    def _tick_prices(self, due, symbols=None):
+        """Price job: tick `symbols`, or every subscribed symbol without a cadence of its own"""
+        with self.lock:
+            if symbols is None:
+                # other workers' subscriptions are not known here, so a shared producer ticks every symbol
+                candidates = self.last_prices if self.bus.shared else self.symbol_subscribers
+                symbols = [symbol for symbol in candidates if symbol not in SYMBOL_TICK_INTERVALS]
+            elif not self.bus.shared:
+                symbols = [symbol for symbol in symbols if symbol in self.symbol_subscribers]
+        if symbols and self.socketio:
+            self._broadcast_tick(symbols, due=due)
+
+    def send_price_updates(self, default_symbols, socketio, due=None):
         try:
             self.socketio = socketio
-            all_coins = set()
-            for coins in self.subscriptions.values():
-                all_coins.update(coins)
-            
-            if not all_coins:
-                all_coins.update(default_symbols)
+            with self.lock:
+                all_coins = list(self.symbol_subscribers) or list(default_symbols)
             
-            if all_coins:
-                for sid, subscribed_coins in self.subscriptions.items():
-                    for coin_id in all_coins:
-                        if (coin_id in subscribed_coins or not subscribed_coins) and coin_id in self.last_prices:
-                            update = self._generate_price_update(coin_id)
-                            print(f"Sending update: {update}")
-                            self.socketio.emit('price_update', update, room=sid)
+            if all_coins and (self.clients or self.bus.shared):
+                self._broadcast_tick(all_coins, include_unsubscribed=True, due=due)
         except Exception as e:
-            print(f"Error in price polling: {e}")
+            logger.error("Error in price polling: %s", e)
+
+websocket_handler = WebSocketHandler()
 
-websocket_handler = WebSocketHandler() 
\ No newline at end of file
+registry.gauge('besttrade_connected_clients', 'Socket.IO clients connected to this worker',
+               function=lambda: len(websocket_handler.clients))
+registry.gauge('besttrade_symbol_subscribers', 'Clients subscribed to each symbol', ('symbol',),
+               function=lambda: {symbol: len(sids) for symbol, sids in list(websocket_handler.symbol_subscribers.items())})
+registry.gauge('besttrade_client_streams', 'Clients receiving batched, rate limited or binary updates',
+               function=lambda: len(websocket_handler.client_streams))
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""Compact binary encoding for price streams.
+
+Negotiated with `{'encoding': 'binary'}` in the subscribe event. The server
+answers with a `subscribed` event carrying the symbol ids and the base
+timestamp, then sends `price_binary` events laid out as (little-endian):
+
+    header  uint8 version, uint16 entry count, int32 frame timestamp delta (ms)
+            relative to the previous frame (the base timestamp for the first)
+    entry   uint16 symbol id, int32 timestamp offset (ms) from the frame
+            timestamp, float64 price
+"""
+from typing import Dict, Iterable, List, Tuple
+import struct
+
+FRAME_VERSION = 1
+HEADER = struct.Struct('<BHi')
+ENTRY = struct.Struct('<Hid')
+
+
+class BinaryPriceEncoder:
+    """Per-client encoder holding the symbol ids and the last frame timestamp"""
+
+    def __init__(self, symbols: Iterable[str], base_timestamp: int):
+        self.symbol_ids = {symbol: index for index, symbol in enumerate(dict.fromkeys(symbols))}
+        self.base_timestamp = base_timestamp
+        self.last_timestamp = base_timestamp
+
+    def encode(self, updates: List[Dict]) -> bytes:
+        entries = [update for update in updates if update['symbol'] in self.symbol_ids]
+        if not entries:
+            return b''
+        frame_timestamp = max(update['timestamp'] for update in entries)
+        parts = [HEADER.pack(FRAME_VERSION, len(entries), frame_timestamp - self.last_timestamp)]
+        for update in entries:
+            parts.append(ENTRY.pack(self.symbol_ids[update['symbol']],
+                                    update['timestamp'] - frame_timestamp,
+                                    update['price']))
+        self.last_timestamp = frame_timestamp
+        return b''.join(parts)
+
+
+def decode_frame(frame: bytes, symbols: Dict[int, str], last_timestamp: int) -> Tuple[List[Dict], int]:
+    """Decode a frame back into updates, returning them with the new last timestamp"""
+    version, count, delta = HEADER.unpack_from(frame, 0)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version: {version}")
+    frame_timestamp = last_timestamp + delta
+    updates = []
+    for index in range(count):
+        symbol_id, offset, price = ENTRY.unpack_from(frame, HEADER.size + index * ENTRY.size)
+        updates.append({
+            'symbol': symbols[symbol_id],
+            'price': price,
+            'timestamp': frame_timestamp + offset
+        })
+    return updates, frame_timestamp
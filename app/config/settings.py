@@ -1,4 +1,6 @@
 from datetime import datetime, timedelta
+import os
+import tempfile
 
 # Flask settings
 DEBUG = True
@@ -18,12 +20,108 @@ SWAGGER_CONFIG = {
 SOCKET_CORS_ORIGINS = "*"
 UPDATE_INTERVAL = 2  
 
-COINGECKO_BASE_URL = "https://api.coingecko.com/api/v3"
+COINGECKO_BASE_URL = os.environ.get('COINGECKO_BASE_URL', "https://api.coingecko.com/api/v3")
+COINGECKO_RATE_LIMIT_PER_MINUTE = 30  # free tier
+COINGECKO_MAX_CONNECTIONS = 4
+COINGECKO_TIMEOUT = 10
+COINGECKO_MAX_RETRIES = 3  # retries of a 429 or 5xx response, each waiting for a rate limit token
+COINGECKO_RETRY_BACKOFF = 2  # seconds before the first retry without Retry-After, doubling after each
 PRICE_UPDATE_INTERVAL = 1  
+# per-symbol tick cadence in seconds overriding PRICE_UPDATE_INTERVAL, e.g. {'bitcoin': 0.5}
+SYMBOL_TICK_INTERVALS = {}
+TICK_SCHEDULER_MAX_SLEEP = 0.1  # longest sleep of the tick scheduler between checks for due jobs
+MAX_CLIENT_UPDATE_RATE = 10  # upper bound for a client's requested max_rate (updates/second)
+STREAMING_EMA_PERIODS = [12, 26]  # per-tick indicators for WebSocket clients subscribing with indicators
+STREAMING_RSI_PERIOD = 14
+STREAMING_STATS_WINDOW = 20
+STREAMING_INDICATOR_WARMUP = 200  # stored prices replayed into a symbol's indicators on first use
+TICK_BUFFER_SIZE = 1024  # recent ticks kept per symbol for replay to reconnecting clients
+
+# Source of the live ticks: 'simulated' (correlated GBM with jumps seeded from sample.json prices)
+# or 'replay' (stored history played back REPLAY_FEED_SPEED times faster); set PRICE_FEED_SEED for repeatable paths
+PRICE_FEED = os.environ.get('PRICE_FEED', 'simulated')
+PRICE_FEED_SEED = int(os.environ['PRICE_FEED_SEED']) if os.environ.get('PRICE_FEED_SEED') else None
+SIMULATED_FEED_DRIFT = 0.0  # annualized
+SIMULATED_FEED_VOLATILITY = 0.8  # annualized
+SIMULATED_FEED_CORRELATION = 0.6  # between any two symbols' returns
+SIMULATED_FEED_JUMPS_PER_DAY = 4
+SIMULATED_FEED_JUMP_MEAN = 0.0  # log return of a jump
+SIMULATED_FEED_JUMP_STD = 0.01
+REPLAY_FEED_SPEED = float(os.environ.get('REPLAY_FEED_SPEED', 3600))
+REPLAY_FEED_LOOP = True  # start the history over at its end instead of holding the last prices
+
+# Bus carrying price ticks to every worker: empty for in-process, redis://host:port to share
+# one producer across the gunicorn workers of every node, elected through a lease on PRODUCER_LEASE_KEY
+MESSAGE_BUS_URL = os.environ.get('MESSAGE_BUS_URL', '')
+PRICE_CHANNEL = 'besttrade:prices'
+PRODUCER_LEASE_KEY = 'besttrade:producer'
+PRODUCER_LEASE_TTL = 15  # seconds a producer keeps the lease without renewing it
+# file lock electing one producer per host, for shared buses that cannot hold a lease
+PRODUCER_LOCK_FILE = os.environ.get('PRODUCER_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'besttrade-producer.lock'))
+PRODUCER_ELECTION_INTERVAL = 5  # seconds between lease renewals, and between attempts by standby workers
 VS_CURRENCY = "usd"  
 
 MAX_HISTORICAL_DAYS = 365  
 
+# Background CoinGecko ingestion into CryptoService
+INGESTION_ENABLED = os.environ.get('INGESTION_ENABLED', '').lower() in ('1', 'true', 'yes')
+INGESTION_PRICE_INTERVAL = 60
+INGESTION_BATCH_SIZE = 250  # coin ids per simple/price request
+INGESTION_BACKFILL_DAYS = 365
+INGESTION_MARKET_PAGES = 40  # /coins/markets pages of 250 fetched for the symbol catalog
+INGESTION_MARKETS_INTERVAL = 600  # seconds between catalog metadata refreshes
+
+# Dataset served by CryptoService, reloaded when the file changes
+DATA_FILE = os.environ.get('DATA_FILE', os.path.join(os.path.dirname(__file__), '..', 'data', 'sample.json'))
+DATA_RELOAD_CHECK_INTERVAL = 5
+
+# Binary columnar copy of DATA_FILE that workers memory-map instead of parsing JSON, built by
+# compile_snapshot.py; workers read DATA_FILE itself while it is missing or stale
+DATA_SNAPSHOT_FILE = os.environ.get('DATA_SNAPSHOT_FILE', os.path.join(os.path.dirname(__file__), '..', 'data', 'sample.snap'))
+
+# Local append-only history (SQLite) filled by ingestion; empty path disables it. Off by default
+# unless ingestion is enabled, set HISTORY_DB_PATH to serve an existing database without ingesting
+HISTORY_DB_PATH = os.environ.get('HISTORY_DB_PATH', os.path.join(os.path.dirname(__file__), '..', 'data', 'history.db')
+                                 if INGESTION_ENABLED else '')
+HISTORY_PRELOAD_DAYS = 365  # recent history loaded into memory at startup
+MAX_STORED_HISTORY_DAYS = 10 * 365  # range limit once the history store holds points
+
+# HTTP response cache for /api/klines and /api/symbols
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RESPONSE_CACHE_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+CACHE_MAX_AGE = 2  # seconds, for responses that change with live prices
+CLOSED_WINDOW_CACHE_MAX_AGE = 3600  # seconds, for kline windows that no longer change
+
+# Rows serialized per chunk for streamed /api/klines responses
+STREAM_CHUNK_SIZE = 1000
+
+# Multi-symbol /api/klines/batch requests
+BATCH_MAX_SYMBOLS = 50
+BATCH_POOL_WORKERS = 4  # threads assembling the symbols of one batch concurrently
+
+# Technical indicators added to /api/klines with ?indicators=
+MAX_INDICATORS_PER_REQUEST = 10
+INDICATOR_CACHE_SIZE = 256  # computed (coin, interval, version, indicators) entries kept
+
+# Logging goes through a bounded queue drained by a background thread; records are dropped when it is full
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_QUEUE_SIZE = 10000
+
+# Prometheus-text metrics endpoint, and the opt-in sampling profiler under /debug/profiler
+METRICS_PATH = '/metrics'
+PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '').lower() in ('1', 'true', 'yes')
+PROFILER_INTERVAL = 0.005  # seconds between stack samples
+PROFILER_MAX_DEPTH = 64
+PROFILER_MAX_SECONDS = 60  # longest one-shot profile served by /debug/profiler/profile
+
+# Symbol catalog behind /api/symbols search and ranking, rebuilt in the background from live prices
+CATALOG_REFRESH_INTERVAL = 10  # seconds a built catalog is served before the next rebuild
+CATALOG_DEFAULT_PAGE_SIZE = 50
+CATALOG_MAX_PAGE_SIZE = 250
+
+# Candle intervals kept pre-aggregated and updated from ingested prices
+ROLLUP_INTERVALS = ['1h', '1d']
+
 # Default parameters
 DEFAULT_END_DATE = datetime.now().strftime('%Y-%m-%d')
 DEFAULT_START_DATE = (datetime.now() - timedelta(days=MAX_HISTORICAL_DAYS-1)).strftime('%Y-%m-%d')  # Last 364 days
@@ -0,0 +1,125 @@
+from typing import Dict, Optional, Tuple
+import threading
+import numpy as np
+from app.utils.candle_utils import CANDLE_FIELDS, bucket_start, resample_ohlcv
+
+
+class CandleRollup:
+    """Materialized OHLCV candles for one coin and interval.
+
+    Candles are built once from the stored history and then kept current
+    by `update`, which only touches the last (open) candle or appends a
+    new one.
+    """
+
+    def __init__(self, interval: str, candles: Optional[Dict[str, np.ndarray]] = None):
+        self.interval = interval
+        self._lock = threading.Lock()
+        candles = candles or resample_ohlcv(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0),
+                                            np.empty(0), interval)
+        self._size = len(candles['timestamps'])
+        capacity = max(16, self._size * 2)
+        self._columns = {}
+        for field in CANDLE_FIELDS:
+            column = np.empty(capacity, dtype=np.int64 if field == 'timestamps' else np.float64)
+            column[:self._size] = candles[field]
+            self._columns[field] = column
+
+    @classmethod
+    def from_series(cls, series, interval: str) -> 'CandleRollup':
+        return cls(interval, resample_ohlcv(series.timestamps, series.prices, series.volumes,
+                                            series.market_caps, interval))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def update(self, timestamp_ms: int, price: float, volume: float = 0.0,
+               market_cap: Optional[float] = None) -> None:
+        """Fold a single tick into the rollup"""
+        bucket = int(bucket_start(timestamp_ms, self.interval))
+        with self._lock:
+            columns = self._columns
+            size = self._size
+            if size and bucket < columns['timestamps'][size - 1]:
+                # late tick for a closed candle
+                index = int(np.searchsorted(columns['timestamps'][:size], bucket))
+                if index < size and columns['timestamps'][index] == bucket:
+                    columns['high'][index] = max(columns['high'][index], price)
+                    columns['low'][index] = min(columns['low'][index], price)
+                    columns['volume'][index] += volume
+                return
+
+            if size and bucket == columns['timestamps'][size - 1]:
+                index = size - 1
+                columns['high'][index] = max(columns['high'][index], price)
+                columns['low'][index] = min(columns['low'][index], price)
+                columns['close'][index] = price
+                columns['volume'][index] += volume
+            else:
+                if size == len(columns['timestamps']):
+                    self._grow()
+                    columns = self._columns
+                index = size
+                columns['timestamps'][index] = bucket
+                columns['open'][index] = price
+                columns['high'][index] = price
+                columns['low'][index] = price
+                columns['close'][index] = price
+                columns['volume'][index] = volume
+                columns['market_cap'][index] = columns['market_cap'][size - 1] if size else 0.0
+                self._size = size + 1
+
+            if market_cap is not None:
+                columns['market_cap'][index] = market_cap
+
+    def index_range(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Tuple[int, int]:
+        """Positions [lo, hi) of the candles starting within start_ms..end_ms"""
+        timestamps = self._columns['timestamps'][:self._size]
+        lo = int(np.searchsorted(timestamps, start_ms, side='left')) if start_ms is not None else 0
+        hi = int(np.searchsorted(timestamps, end_ms, side='right')) if end_ms is not None else len(timestamps)
+        return lo, max(lo, hi)
+
+    def window(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Copy of the candles in the range plus the close of the candle before it"""
+        with self._lock:
+            lo, hi = self.index_range(start_ms, end_ms)
+            candles = {field: column[lo:hi].copy() for field, column in self._columns.items()}
+            candles['prev_close'] = float(self._columns['close'][lo - 1]) if lo > 0 else None
+        return candles
+
+    def _grow(self) -> None:
+        capacity = max(16, len(self._columns['timestamps']) * 2)
+        for field, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[field] = grown
+
+
+class RollupCache:
+    """Candle rollups for every coin in a store at a fixed set of intervals"""
+
+    def __init__(self, intervals):
+        self.intervals = tuple(intervals)
+        self._rollups: Dict[Tuple[str, str], CandleRollup] = {}
+
+    @classmethod
+    def from_store(cls, store, intervals) -> 'RollupCache':
+        cache = cls(intervals)
+        for coin_id in store:
+            cache.rebuild(coin_id, store.get(coin_id))
+        return cache
+
+    def rebuild(self, coin_id: str, series) -> None:
+        for interval in self.intervals:
+            self._rollups[(coin_id, interval)] = CandleRollup.from_series(series, interval)
+
+    def get(self, coin_id: str, interval: str) -> Optional[CandleRollup]:
+        return self._rollups.get((coin_id, interval))
+
+    def update(self, coin_id: str, timestamp_ms: int, price: float, volume: float = 0.0,
+               market_cap: Optional[float] = None) -> None:
+        for interval in self.intervals:
+            rollup = self._rollups.get((coin_id, interval))
+            if rollup is None:
+                rollup = self._rollups[(coin_id, interval)] = CandleRollup(interval)
+            rollup.update(timestamp_ms, price, volume, market_cap)
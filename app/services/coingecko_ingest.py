@@ -0,0 +1,205 @@
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config.settings import (
+    COINGECKO_BASE_URL, COINGECKO_RATE_LIMIT_PER_MINUTE, COINGECKO_MAX_CONNECTIONS,
+    COINGECKO_TIMEOUT, COINGECKO_MAX_RETRIES, COINGECKO_RETRY_BACKOFF, VS_CURRENCY, INGESTION_BATCH_SIZE, INGESTION_PRICE_INTERVAL,
+    INGESTION_BACKFILL_DAYS, DEFAULT_SYMBOLS, INGESTION_MARKET_PAGES, INGESTION_MARKETS_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+# responses retried by CoinGeckoClient._get through the rate limiter
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket spacing out calls to a rate-limited API"""
+
+    def __init__(self, rate_per_minute: float, burst: int = 1,
+                 time_fn: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.time_fn = time_fn
+        self.updated_at = time_fn()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it"""
+        with self._lock:
+            self._refill(self.time_fn())
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self, sleep_fn: Callable[[float], None] = time.sleep) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            sleep_fn(delay)
+
+
+class CoinGeckoClient:
+    """CoinGecko API client sharing one pooled session and one rate limiter"""
+
+    def __init__(self, base_url: str = COINGECKO_BASE_URL, bucket: Optional[TokenBucket] = None,
+                 session: Optional[requests.Session] = None,
+                 sleep_fn: Callable[[float], None] = time.sleep):
+        self.base_url = base_url.rstrip('/')
+        self.bucket = bucket or TokenBucket(COINGECKO_RATE_LIMIT_PER_MINUTE)
+        self.sleep_fn = sleep_fn
+        self.session = session or self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # only connection errors are retried here, as the request never reached CoinGecko;
+        # 429 and 5xx are retried by _get, so every attempt takes a token
+        retry = Retry(total=COINGECKO_MAX_RETRIES, connect=COINGECKO_MAX_RETRIES, read=0, status=0,
+                      backoff_factor=COINGECKO_RETRY_BACKOFF, allowed_methods=('GET',),
+                      respect_retry_after_header=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=COINGECKO_MAX_CONNECTIONS, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept': 'application/json'})
+        return session
+
+    def _get(self, path: str, params: Dict) -> Dict:
+        """GET through the rate limiter, retrying 429 and 5xx responses with a new token per attempt"""
+        for attempt in range(COINGECKO_MAX_RETRIES + 1):
+            self.bucket.acquire(self.sleep_fn)
+            response = self.session.get(f"{self.base_url}{path}", params=params, timeout=COINGECKO_TIMEOUT)
+            if response.status_code not in RETRY_STATUSES or attempt == COINGECKO_MAX_RETRIES:
+                break
+            delay = self._retry_delay(response, attempt)
+            logger.warning("CoinGecko %s returned %s, retrying in %.1fs", path, response.status_code, delay)
+            self.sleep_fn(delay)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _retry_delay(response: requests.Response, attempt: int) -> float:
+        """Retry-After in seconds when the server sent one, else exponential backoff"""
+        try:
+            return max(0.0, float(response.headers['Retry-After']))
+        except (KeyError, ValueError):
+            return COINGECKO_RETRY_BACKOFF * 2 ** attempt
+
+    def simple_price(self, coin_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Current prices for all coins, fetched in batches of INGESTION_BATCH_SIZE ids"""
+        coin_ids = list(coin_ids)
+        prices = {}
+        for start in range(0, len(coin_ids), INGESTION_BATCH_SIZE):
+            prices.update(self._get('/simple/price', {
+                'ids': ','.join(coin_ids[start:start + INGESTION_BATCH_SIZE]),
+                'vs_currencies': VS_CURRENCY,
+                'include_market_cap': 'true',
+                'include_24hr_vol': 'true',
+                'include_last_updated_at': 'true'
+            }))
+        return prices
+
+    def coins_markets(self, page: int = 1, per_page: int = 250) -> List[Dict]:
+        """One page of coin metadata and market data, ordered by market cap"""
+        return self._get('/coins/markets', {
+            'vs_currency': VS_CURRENCY,
+            'order': 'market_cap_desc',
+            'per_page': per_page,
+            'page': page,
+            'price_change_percentage': '24h'
+        })
+
+    def market_chart_range(self, coin_id: str, from_ts: int, to_ts: int) -> Dict[str, List]:
+        """Historical prices, volumes and market caps between two unix timestamps (seconds)"""
+        return self._get(f"/coins/{coin_id}/market_chart/range", {
+            'vs_currency': VS_CURRENCY,
+            'from': int(from_ts),
+            'to': int(to_ts)
+        })
+
+
+class IngestionService:
+    """Background job feeding CoinGecko prices and history into CryptoService"""
+
+    def __init__(self, crypto_service, client: Optional[CoinGeckoClient] = None,
+                 coin_ids: Optional[Iterable[str]] = None,
+                 sleep_fn: Callable[[float], None] = time.sleep):
+        self.crypto_service = crypto_service
+        self.client = client or CoinGeckoClient(sleep_fn=sleep_fn)
+        self.coin_ids = list(coin_ids) if coin_ids is not None else None
+        self.sleep_fn = sleep_fn
+        self.running = False
+
+    def tracked_coins(self) -> List[str]:
+        if self.coin_ids is not None:
+            return self.coin_ids
+        return list(dict.fromkeys(DEFAULT_SYMBOLS + self.crypto_service.store.coin_ids()))
+
+    def fetch_prices(self) -> int:
+        """Fetch current prices for every tracked coin and ingest them as ticks"""
+        ingested = 0
+        for coin_id, quote in self.client.simple_price(self.tracked_coins()).items():
+            price = quote.get(VS_CURRENCY)
+            if price is None:
+                continue
+            timestamp = int(quote.get('last_updated_at') or time.time()) * 1000
+            if self.crypto_service.ingest_tick(coin_id, timestamp, float(price),
+                                               market_cap=quote.get(f"{VS_CURRENCY}_market_cap")):
+                ingested += 1
+        return ingested
+
+    def backfill(self, coin_id: str, days: int = INGESTION_BACKFILL_DAYS) -> int:
+        """Fetch only the gap after the last stored point (at most `days` back) into the store"""
+        now = int(time.time())
+        last_ms = self.crypto_service.last_stored_timestamp(coin_id)
+        from_ts = now - days * 24 * 60 * 60
+        if last_ms is not None:
+            from_ts = max(from_ts, last_ms // 1000 + 1)
+        if from_ts >= now:
+            return 0
+        market_data = self.client.market_chart_range(coin_id, from_ts, now)
+        return self.crypto_service.ingest_history(coin_id, market_data)
+
+    def refresh_markets(self, pages: int = INGESTION_MARKET_PAGES) -> int:
+        """Fetch metadata of the top `pages` * 250 coins for the symbol catalog"""
+        updated = 0
+        for page in range(1, pages + 1):
+            rows = self.client.coins_markets(page)
+            if not rows:
+                break
+            updated += self.crypto_service.update_market_metadata(rows)
+        return updated
+
+    def run(self) -> None:
+        """Backfill every tracked coin once, then poll prices every INGESTION_PRICE_INTERVAL seconds
+        and refresh catalog metadata every INGESTION_MARKETS_INTERVAL seconds"""
+        self.running = True
+        markets_refreshed_at = None
+        for coin_id in self.tracked_coins():
+            try:
+                self.backfill(coin_id)
+            except Exception as e:
+                logger.error("Error backfilling %s: %s", coin_id, e)
+
+        while self.running:
+            started = time.monotonic()
+            if markets_refreshed_at is None or started - markets_refreshed_at >= INGESTION_MARKETS_INTERVAL:
+                markets_refreshed_at = started
+                try:
+                    self.refresh_markets()
+                except Exception as e:
+                    logger.error("Error fetching coin markets: %s", e)
+            try:
+                self.fetch_prices()
+            except Exception as e:
+                logger.error("Error fetching prices: %s", e)
+            self.sleep_fn(max(0.0, INGESTION_PRICE_INTERVAL - (time.monotonic() - started)))
+
+    def stop(self) -> None:
+        self.running = False
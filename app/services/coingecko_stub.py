@@ -0,0 +1,151 @@
+"""Local stand-in for the CoinGecko endpoints used by the ingestion service.
+
+Serves `simple/price`, `coins/markets` and `coins/<id>/market_chart/range`
+from a dataset in the sample.json shape and can enforce a per-minute request
+limit with 429 responses, so ingestion can be exercised offline:
+
+    server = CoinGeckoStub(); server.start()
+    client = CoinGeckoClient(base_url=server.base_url)
+"""
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+import json
+import re
+import threading
+import time
+from app.config.settings import DATA_FILE, VS_CURRENCY
+
+MARKET_CHART_PATH = re.compile(r'^/coins/([^/]+)/market_chart/range$')
+
+
+class CoinGeckoStub:
+    """CoinGecko fake running on a background thread"""
+
+    def __init__(self, data: Optional[Dict] = None, host: str = '127.0.0.1', port: int = 0,
+                 rate_limit_per_minute: Optional[int] = None):
+        if data is None:
+            with open(DATA_FILE, 'r') as f:
+                data = json.load(f)
+        self.data = data
+        self.rate_limit_per_minute = rate_limit_per_minute
+        # (time, path) of the requests of the last minute, for the rate limit
+        self.request_log = deque()
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'CoinGeckoStub':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _allow(self, path: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self.requests_served += 1
+            self.request_log.append((now, path))
+            while now - self.request_log[0][0] >= 60:
+                self.request_log.popleft()
+            if not self.rate_limit_per_minute:
+                return True
+            return len(self.request_log) <= self.rate_limit_per_minute
+
+    def simple_price(self, query: Dict) -> Dict:
+        ids = (query.get('ids') or [''])[0].split(',')
+        prices = {}
+        for coin_id in ids:
+            market_data = self.data.get(coin_id, {}).get('market_data')
+            if not market_data:
+                continue
+            history = self.data.get('historical', {}).get(coin_id, {})
+            last_volume = (history.get('total_volumes') or [[0, 0]])[-1][1]
+            last_market_cap = (history.get('market_caps') or [[0, 0]])[-1][1]
+            prices[coin_id] = {
+                VS_CURRENCY: market_data['current_price'][VS_CURRENCY],
+                f"{VS_CURRENCY}_market_cap": last_market_cap,
+                f"{VS_CURRENCY}_24h_vol": last_volume,
+                'last_updated_at': int(time.time())
+            }
+        return prices
+
+    def coins_markets(self, query: Dict) -> List[Dict]:
+        per_page = int(query.get('per_page', ['100'])[0])
+        page = int(query.get('page', ['1'])[0])
+        coins = [info for coin_id, info in self.data.items() if coin_id != 'historical' and isinstance(info, dict)]
+        coins.sort(key=lambda info: info.get('market_cap_rank') or float('inf'))
+        rows = []
+        for info in coins[(page - 1) * per_page:page * per_page]:
+            market_data = info.get('market_data', {})
+            row = {
+                'id': info.get('id'),
+                'symbol': info.get('symbol', '').lower(),
+                'name': info.get('name'),
+                'market_cap_rank': info.get('market_cap_rank'),
+                'current_price': market_data.get('current_price', {}).get(VS_CURRENCY)
+            }
+            for field in ('total_supply', 'max_supply', 'circulating_supply'):
+                row[field] = market_data.get(field)
+            for field in ('ath', 'atl', 'ath_change_percentage', 'atl_change_percentage'):
+                row[field] = market_data.get(field, {}).get(VS_CURRENCY)
+            rows.append(row)
+        return rows
+
+    def market_chart_range(self, coin_id: str, query: Dict) -> Optional[Dict]:
+        history = self.data.get('historical', {}).get(coin_id)
+        if history is None:
+            return None
+        start_ms = int(query.get('from', ['0'])[0]) * 1000
+        end_ms = int(query.get('to', ['0'])[0]) * 1000
+        return {
+            key: [pair for pair in history.get(key, []) if start_ms <= pair[0] <= end_ms]
+            for key in ('prices', 'market_caps', 'total_volumes')
+        }
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                path = url.path.replace('/api/v3', '', 1)
+                if not stub._allow(path):
+                    return self._send(429, {'status': {'error_code': 429}}, {'Retry-After': '1'})
+                if path == '/simple/price':
+                    return self._send(200, stub.simple_price(query))
+                if path == '/coins/markets':
+                    return self._send(200, stub.coins_markets(query))
+                match = MARKET_CHART_PATH.match(path)
+                if match:
+                    chart = stub.market_chart_range(match.group(1), query)
+                    if chart is not None:
+                        return self._send(200, chart)
+                    return self._send(404, {'error': 'coin not found'})
+                return self._send(404, {'error': 'not found'})
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
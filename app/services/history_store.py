@@ -0,0 +1,94 @@
+from typing import List, Optional
+import sqlite3
+import threading
+import numpy as np
+from app.services.timeseries_store import CoinSeries
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    coin_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    price REAL NOT NULL,
+    volume REAL NOT NULL,
+    market_cap REAL NOT NULL,
+    PRIMARY KEY (coin_id, timestamp)
+) WITHOUT ROWID
+"""
+
+
+class HistoryStore:
+    """Append-only SQLite store of historical points, indexed by (coin_id, timestamp).
+
+    Each thread gets its own connection; WAL mode lets worker processes read
+    while one of them writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connection() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def append(self, coin_id: str, series: CoinSeries) -> int:
+        """Store the points of a series, ignoring timestamps already stored"""
+        if not len(series):
+            return 0
+        rows = zip([coin_id] * len(series), series.timestamps.tolist(), series.prices.tolist(),
+                   series.volumes.tolist(), series.market_caps.tolist())
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                cursor = connection.executemany(
+                    'INSERT OR IGNORE INTO points (coin_id, timestamp, price, volume, market_cap) '
+                    'VALUES (?, ?, ?, ?, ?)', rows)
+            return cursor.rowcount
+
+    def last_timestamp(self, coin_id: str) -> Optional[int]:
+        row = self._connection().execute(
+            'SELECT MAX(timestamp) FROM points WHERE coin_id = ?', (coin_id,)).fetchone()
+        return row[0] if row else None
+
+    def first_timestamp(self, coin_id: str) -> Optional[int]:
+        row = self._connection().execute(
+            'SELECT MIN(timestamp) FROM points WHERE coin_id = ?', (coin_id,)).fetchone()
+        return row[0] if row else None
+
+    def price_before(self, coin_id: str, timestamp_ms: int) -> Optional[float]:
+        """Price of the last stored point strictly before timestamp_ms"""
+        row = self._connection().execute(
+            'SELECT price FROM points WHERE coin_id = ? AND timestamp < ? ORDER BY timestamp DESC LIMIT 1',
+            (coin_id, int(timestamp_ms))).fetchone()
+        return row[0] if row else None
+
+    def coin_ids(self) -> List[str]:
+        return [row[0] for row in self._connection().execute('SELECT DISTINCT coin_id FROM points')]
+
+    def load(self, coin_id: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> CoinSeries:
+        """Points of a coin with start_ms <= timestamp <= end_ms, as a columnar series"""
+        query = 'SELECT timestamp, price, volume, market_cap FROM points WHERE coin_id = ?'
+        params = [coin_id]
+        if start_ms is not None:
+            query += ' AND timestamp >= ?'
+            params.append(int(start_ms))
+        if end_ms is not None:
+            query += ' AND timestamp <= ?'
+            params.append(int(end_ms))
+        rows = self._connection().execute(query + ' ORDER BY timestamp', params).fetchall()
+        if not rows:
+            return CoinSeries.empty()
+
+        values = np.array(rows, dtype=np.float64)
+        return CoinSeries(np.array([row[0] for row in rows], dtype=np.int64),
+                          np.ascontiguousarray(values[:, 1]),
+                          np.ascontiguousarray(values[:, 2]),
+                          np.ascontiguousarray(values[:, 3]))
@@ -0,0 +1,357 @@
+"""Pub/sub buses carrying price ticks from the producer to every worker.
+
+`create_message_bus('')` returns an in-process bus (single worker, tests).
+`create_message_bus('redis://host:6379')` speaks RESP over plain sockets to
+Redis or any compatible server, such as the stand-in in resp_stub.py, so
+gunicorn workers and nodes share one price stream. `create_producer_election`
+picks who produces it: a lease held in that Redis, so one worker across all
+nodes, or a file lock electing one per host for buses without leases.
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from app.config.settings import PRODUCER_LEASE_KEY, PRODUCER_LEASE_TTL, PRODUCER_LOCK_FILE
+
+try:
+    import fcntl
+except ImportError:  # Windows, where there is a single worker process anyway
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[Dict], None]
+
+# compare-and-expire and compare-and-delete of the producer lease, atomic on the server
+LEASE_RENEW_SCRIPT = ("if redis.call('get', KEYS[1]) == ARGV[1] then "
+                      "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end")
+LEASE_RELEASE_SCRIPT = ("if redis.call('get', KEYS[1]) == ARGV[1] then "
+                        "return redis.call('del', KEYS[1]) else return 0 end")
+
+
+class MessageBus(ABC):
+    """Publish JSON-serializable dicts to channels and deliver them to subscribers"""
+
+    # whether other processes see the messages, i.e. one producer serves every worker
+    shared = False
+
+    @abstractmethod
+    def publish(self, channel: str, message: Dict) -> None:
+        """Deliver `message` to every subscriber of `channel`"""
+
+    @abstractmethod
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        """Call `callback` with each message published to `channel` from now on"""
+
+    def close(self) -> None:
+        pass
+
+
+class InProcessBus(MessageBus):
+    """Synchronous bus within one process; callbacks run in the publisher's thread"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callback]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: Dict) -> None:
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+
+
+class RespConnection:
+    """Minimal RESP2 client connection"""
+
+    def __init__(self, host: str, port: int, password: Optional[str] = None, timeout: Optional[float] = 10):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+        if password:
+            self.command('AUTH', password)
+
+    def send(self, *args) -> None:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self.sock.sendall(b''.join(parts))
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by server')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode('utf-8')
+        if kind == b'-':
+            raise RuntimeError(rest.decode('utf-8'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(rest)
+            return None if count < 0 else [self.read_reply() for _ in range(count)]
+        raise RuntimeError(f"Unexpected RESP reply: {line!r}")
+
+    def command(self, *args):
+        self.send(*args)
+        return self.read_reply()
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisBus(MessageBus):
+    """Bus over Redis pub/sub, using one connection to publish and one to listen.
+
+    The listener thread reads from its connection while subscribe() may
+    write SUBSCRIBE to it from another thread; writes and the swap of the
+    connection on reconnect are serialized by one lock, and every reconnect
+    subscribes to the full channel set again. Pub/sub keeps no history, so
+    messages published before the server confirms a subscription are not
+    delivered; wait_until_subscribed() blocks until every channel is confirmed.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, reconnect_delay: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.reconnect_delay = reconnect_delay
+        self._publisher: Optional[RespConnection] = None
+        self._publish_lock = threading.Lock()
+        self._subscribers: Dict[str, List[Callback]] = {}
+        self._listener: Optional[RespConnection] = None
+        # guards _subscribers, _confirmed and writes to (and replacing of) the listener connection
+        self._listener_lock = threading.Lock()
+        self._listener_thread = None
+        # channels the current listener connection has confirmed
+        self._confirmed = set()
+        self._subscribed = threading.Event()
+        self._closed = False
+
+    def _connect(self, timeout: Optional[float] = 10) -> RespConnection:
+        return RespConnection(self.host, self.port, self.password, timeout)
+
+    def command(self, *args):
+        """Run one command on the publishing connection, reconnecting once if it dropped"""
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = self._connect()
+                    return self._publisher.command(*args)
+                except (OSError, ConnectionError) as e:
+                    if self._publisher is not None:
+                        self._publisher.close()
+                    self._publisher = None
+                    if attempt:
+                        raise ConnectionError(f"Could not reach {self.host}:{self.port}: {e}")
+
+    def publish(self, channel: str, message: Dict) -> None:
+        self.command('PUBLISH', channel, json.dumps(message, separators=(',', ':')))
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        with self._listener_lock:
+            new_channel = channel not in self._subscribers
+            self._subscribers.setdefault(channel, []).append(callback)
+            if new_channel:
+                self._subscribed.clear()
+                # without a connection, the listener subscribes to it when it (re)connects
+                if self._listener is not None:
+                    try:
+                        self._listener.send('SUBSCRIBE', channel)
+                    except OSError as e:
+                        logger.warning("Could not subscribe to %s before reconnecting: %s", channel, e)
+            if self._listener_thread is None:
+                self._listener_thread = threading.Thread(target=self._listen, daemon=True)
+                self._listener_thread.start()
+
+    def wait_until_subscribed(self, timeout: float = 5) -> bool:
+        return self._subscribed.wait(timeout)
+
+    def _listen(self) -> None:
+        while not self._closed:
+            try:
+                connection = self._connect(timeout=None)
+                with self._listener_lock:
+                    self._listener = connection
+                    self._confirmed = set()
+                    connection.send('SUBSCRIBE', *self._subscribers)
+                while not self._closed:
+                    reply = connection.read_reply()
+                    if not isinstance(reply, list) or not reply:
+                        continue
+                    kind = reply[0]
+                    if kind == b'subscribe':
+                        with self._listener_lock:
+                            self._confirmed.add(reply[1].decode('utf-8'))
+                            if self._confirmed.issuperset(self._subscribers):
+                                self._subscribed.set()
+                    elif kind == b'message':
+                        self._dispatch(reply[1].decode('utf-8'), reply[2])
+            except (OSError, ConnectionError, RuntimeError) as e:
+                if not self._closed:
+                    logger.warning("Message bus connection lost: %s", e)
+                    time.sleep(self.reconnect_delay)
+            finally:
+                with self._listener_lock:
+                    self._subscribed.clear()
+                    if self._listener is not None:
+                        self._listener.close()
+                        self._listener = None
+
+    def _dispatch(self, channel: str, payload: bytes) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError as e:
+            logger.warning("Ignoring malformed message on %s: %s", channel, e)
+            return
+        with self._listener_lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error("Error handling message on %s: %s", channel, e)
+
+    def close(self) -> None:
+        self._closed = True
+        with self._publish_lock:
+            if self._publisher is not None:
+                self._publisher.close()
+                self._publisher = None
+        if self._listener is not None:
+            try:
+                self._listener.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def create_message_bus(url: Optional[str]) -> MessageBus:
+    """Bus for a MESSAGE_BUS_URL: empty or memory:// for in-process, redis:// for Redis"""
+    if not url or url.startswith('memory://'):
+        return InProcessBus()
+    if url.startswith('redis://'):
+        return RedisBus(url)
+    raise ValueError(f"Unsupported message bus URL: {url}")
+
+
+class ProducerElection:
+    """Elects the single price producer among the processes of one host through an exclusive file lock.
+
+    The lock is held for the life of the process, so when the producer
+    exits another worker's `try_acquire` succeeds and takes over. Workers on
+    other hosts do not see the lock; a bus shared across nodes needs
+    RedisLeaseElection instead.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode('ascii'))
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None and self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
+
+
+class RedisLeaseElection:
+    """Elects the single price producer among every worker on a Redis bus through an expiring lease.
+
+    The lease is a key set with NX and a TTL to a token naming this worker.
+    The producer renews it every PRODUCER_ELECTION_INTERVAL with a
+    compare-and-expire script, so it only ever extends its own lease; if the
+    producer dies or stalls, the key expires and the next standby's
+    `try_acquire` takes over. `is_leader` also turns false once the local
+    deadline of the last renewal passes, which is measured from before the
+    renewal was sent, so a stalled producer stops producing before anyone
+    else can acquire the lease.
+    """
+
+    def __init__(self, bus: RedisBus, key: str = PRODUCER_LEASE_KEY, ttl: float = PRODUCER_LEASE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.bus = bus
+        self.key = key
+        self.ttl_ms = int(ttl * 1000)
+        self.clock = clock
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._expires_at = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return self.clock() < self._expires_at
+
+    def try_acquire(self) -> bool:
+        """Renew the lease if this worker holds it, otherwise try to take it; True while leader"""
+        started = self.clock()
+        try:
+            held = self.bus.command('EVAL', LEASE_RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms) == 1
+            if not held:
+                held = self.bus.command('SET', self.key, self.token, 'NX', 'PX', self.ttl_ms) == 'OK'
+        except (ConnectionError, RuntimeError) as e:
+            # unknown outcome: the lease may still be ours until the previous deadline
+            logger.warning("Could not renew the producer lease: %s", e)
+            return self.is_leader
+        self._expires_at = started + self.ttl_ms / 1000.0 if held else 0.0
+        return held
+
+    def release(self) -> None:
+        self._expires_at = 0.0
+        try:
+            self.bus.command('EVAL', LEASE_RELEASE_SCRIPT, 1, self.key, self.token)
+        except (ConnectionError, RuntimeError) as e:
+            logger.warning("Could not release the producer lease: %s", e)
+
+
+def create_producer_election(bus: MessageBus):
+    """Lease election for a Redis bus, one producer per host (file lock) for any other shared bus"""
+    if isinstance(bus, RedisBus):
+        return RedisLeaseElection(bus)
+    return ProducerElection(PRODUCER_LOCK_FILE)
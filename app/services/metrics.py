@@ -0,0 +1,251 @@
+"""In-process counters, gauges and histograms rendered in the Prometheus text format.
+
+Metrics are registered once at import time on the module-level `registry`
+and updated from request handlers and the tick loops; `/metrics` renders
+them. Recording takes one short lock per metric and does no I/O.
+"""
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+
+LabelValues = Tuple[str, ...]
+
+# seconds, from sub-millisecond phases to multi-second requests
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """A named metric with optional labels; `labels(...)` returns the child for one label set.
+
+    Counters and gauges can instead be read at render time from `function`,
+    which returns a number, or for labelled metrics a dict mapping label
+    values (a tuple, or a plain value for one label) to numbers.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 function: Optional[Callable] = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.function = function
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """Empty child holding the value of one label set"""
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(suffix, label string, value) for every child"""
+        if self.function is None:
+            return [('', _format_labels(self.label_names, key), child.value)
+                    for key, child in list(self._children.items())]
+        try:
+            values = self.function()
+        except Exception:
+            return []
+        if not self.label_names:
+            return [('', '', float(values))]
+        return [('', _format_labels(self.label_names, key if isinstance(key, tuple) else (key,)), float(value))
+                for key, value in values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}"
+                     for suffix, labels, value in self.samples())
+        return '\n'.join(lines)
+
+
+class _Value:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self.lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'counts', 'sum', 'lock')
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.upper_bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> '_Timer':
+        return _Timer(self)
+
+
+class _Timer:
+    """Context manager observing the seconds spent in its block"""
+
+    __slots__ = ('child', 'started')
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self) -> '_Timer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def samples(self):
+        samples = []
+        for key, child in list(self._children.items()):
+            with child.lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                samples.append(('_bucket', _format_labels(self.label_names, key, le), cumulative))
+            labels = _format_labels(self.label_names, key)
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                function: Optional[Callable] = None) -> Counter:
+        return self.register(Counter(name, documentation, label_names, function))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = (),
+              function: Optional[Callable] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names, function))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'besttrade_http_request_seconds', 'API request latency by endpoint and status', ('endpoint', 'status'))
+KLINES_PHASE_SECONDS = registry.histogram(
+    'besttrade_klines_phase_seconds', 'Time spent in each phase of building a klines response', ('phase',))
+TICK_DURATION_SECONDS = registry.histogram(
+    'besttrade_tick_duration_seconds', 'Run time of a scheduled tick job', ('job',))
+TICK_LAG_SECONDS = registry.histogram(
+    'besttrade_tick_lag_seconds', 'How late a scheduled tick job started relative to its deadline', ('job',))
+TICK_OVERRUNS = registry.counter(
+    'besttrade_tick_overruns_total', 'Tick job runs that took longer than the job interval', ('job',))
+TICKS_SKIPPED = registry.counter(
+    'besttrade_ticks_skipped_total', 'Tick deadlines skipped because the job fell behind', ('job',))
+TICK_EMITS = registry.histogram(
+    'besttrade_tick_emits', 'Socket.IO emits made to deliver one tick', buckets=COUNT_BUCKETS)
+SOCKET_EVENTS = registry.counter(
+    'besttrade_socketio_events_total', 'Socket.IO connect, disconnect and subscribe events', ('event',))
+LOG_RECORDS_DROPPED = registry.counter(
+    'besttrade_log_records_dropped_total', 'Log records dropped because the log queue was full')
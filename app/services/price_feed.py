@@ -0,0 +1,219 @@
+"""Sources of the simulated live prices ticked to WebSocket clients.
+
+`SimulatedFeed` steps correlated geometric Brownian motion with jumps for
+every requested symbol in one vectorized call; with a fixed seed the paths
+repeat exactly. `ReplayFeed` plays the stored history back at N times real
+speed. Neither touches the upstream API, so both serve load tests and demos;
+their ticks are marked synthetic and never reach the stored history.
+`create_price_feed` picks one by the PRICE_FEED setting.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence
+import math
+import numpy as np
+from app.config.settings import (
+    PRICE_FEED, PRICE_FEED_SEED, PRICE_UPDATE_INTERVAL, VS_CURRENCY,
+    SIMULATED_FEED_DRIFT, SIMULATED_FEED_VOLATILITY, SIMULATED_FEED_CORRELATION,
+    SIMULATED_FEED_JUMPS_PER_DAY, SIMULATED_FEED_JUMP_MEAN, SIMULATED_FEED_JUMP_STD,
+    REPLAY_FEED_SPEED, REPLAY_FEED_LOOP
+)
+from app.services.timeseries_store import TimeSeriesStore
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class FeedSource(ABC):
+    """Produces the next price of a batch of symbols for one tick"""
+
+    # made-up or replayed prices, which are streamed to clients but never stored as history
+    synthetic = True
+
+    @abstractmethod
+    def initial_prices(self) -> Dict[str, float]:
+        """Price of every symbol the feed knows before its first tick"""
+
+    @abstractmethod
+    def next_prices(self, symbols: Sequence[str], timestamp_ms: int) -> Dict[str, float]:
+        """Prices at the tick time `timestamp_ms` of the known symbols among `symbols`"""
+
+    def sync(self, prices: Dict[str, float]) -> None:
+        """Continue from prices produced elsewhere, e.g. by a previous producer worker"""
+
+
+class SimulatedFeed(FeedSource):
+    """Correlated GBM with Poisson jumps, one NumPy step for all symbols of a tick.
+
+    Each symbol's log return over dt seconds is
+    (drift - volatility^2 / 2) * t + volatility * sqrt(t) * e + J, with t in
+    years, e = sqrt(rho) * M + sqrt(1 - rho) * Z mixing one market-wide
+    normal M shared by the tick with a normal Z of the symbol, so every pair
+    is correlated by rho, and J the sum of a Poisson(jumps_per_day * dt)
+    number of normal jumps. dt is the time since the symbol's previous tick,
+    so symbols on different cadences or skipped ticks keep the same
+    annualized volatility.
+    """
+
+    def __init__(self, initial_prices: Dict[str, float], seed: Optional[int] = PRICE_FEED_SEED,
+                 drift: float = SIMULATED_FEED_DRIFT, volatility: float = SIMULATED_FEED_VOLATILITY,
+                 correlation: float = SIMULATED_FEED_CORRELATION,
+                 jumps_per_day: float = SIMULATED_FEED_JUMPS_PER_DAY,
+                 jump_mean: float = SIMULATED_FEED_JUMP_MEAN, jump_std: float = SIMULATED_FEED_JUMP_STD,
+                 default_dt: float = PRICE_UPDATE_INTERVAL):
+        if not 0 <= correlation <= 1:
+            raise ValueError("correlation must be between 0 and 1")
+        self.symbols = list(initial_prices)
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.prices = np.array([initial_prices[symbol] for symbol in self.symbols], dtype=np.float64)
+        # tick time of each symbol's last step, 0 before the first one
+        self.timestamps = np.zeros(len(self.symbols), dtype=np.int64)
+        self.rng = np.random.default_rng(seed)
+        self.drift = drift
+        self.volatility = volatility
+        self.market_weight = math.sqrt(correlation)
+        self.own_weight = math.sqrt(1 - correlation)
+        self.jump_rate = jumps_per_day / SECONDS_PER_DAY
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+        self.default_dt = default_dt
+
+    def initial_prices(self) -> Dict[str, float]:
+        return dict(zip(self.symbols, self.prices.tolist()))
+
+    def _indices(self, symbols: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self._index[symbol] for symbol in symbols if symbol in self._index), dtype=np.int64)
+
+    def step(self, indices: np.ndarray, timestamp_ms: int) -> np.ndarray:
+        """Advance the symbols at `indices` to `timestamp_ms`; returns their new prices"""
+        n = len(indices)
+        last = self.timestamps[indices]
+        dt = np.where(last > 0, np.maximum(timestamp_ms - last, 0) / 1000.0, self.default_dt)
+        years = dt / SECONDS_PER_YEAR
+        shocks = self.market_weight * self.rng.standard_normal() + self.own_weight * self.rng.standard_normal(n)
+        log_returns = (self.drift - 0.5 * self.volatility ** 2) * years + self.volatility * np.sqrt(years) * shocks
+        if self.jump_rate > 0:
+            jumps = self.rng.poisson(self.jump_rate * dt)
+            log_returns += jumps * self.jump_mean + np.sqrt(jumps) * self.jump_std * self.rng.standard_normal(n)
+        prices = self.prices[indices] * np.exp(log_returns)
+        self.prices[indices] = prices
+        self.timestamps[indices] = timestamp_ms
+        return prices
+
+    def next_prices(self, symbols: Sequence[str], timestamp_ms: int) -> Dict[str, float]:
+        indices = self._indices(symbols)
+        if not len(indices):
+            return {}
+        prices = self.step(indices, timestamp_ms)
+        return {self.symbols[i]: price for i, price in zip(indices.tolist(), prices.tolist())}
+
+    def sync(self, prices: Dict[str, float]) -> None:
+        for symbol, price in prices.items():
+            index = self._index.get(symbol)
+            if index is not None and price > 0:
+                self.prices[index] = price
+
+
+class ReplayFeed(FeedSource):
+    """Plays stored history back at `speed` times real time, interpolating between stored points.
+
+    The first tick maps to the start of the stored history and each
+    millisecond of tick time after it to `speed` milliseconds of history.
+    Past the end the replay starts over (loop) or holds the last prices.
+    The series are copied at construction, so live ticks appended to the
+    store are not replayed.
+
+    All series are concatenated into one array with each series' times
+    shifted by its row times the history span, which keeps the array sorted,
+    so one searchsorted call finds the surrounding points of every symbol.
+    """
+
+    def __init__(self, store: TimeSeriesStore, speed: float = REPLAY_FEED_SPEED, loop: bool = REPLAY_FEED_LOOP):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = speed
+        self.loop = loop
+        series = [(coin_id, store.get(coin_id)) for coin_id in store.coin_ids()]
+        series = [(coin_id, s) for coin_id, s in series if s is not None and len(s)]
+        self.symbols = [coin_id for coin_id, _ in series]
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.start_ms = float(min((s.timestamps[0] for _, s in series), default=0))
+        self.end_ms = float(max((s.timestamps[-1] for _, s in series), default=0))
+        # gap between consecutive series in the concatenated keys, wider than any series
+        self._stride = self.end_ms - self.start_ms + 1
+        lengths = np.array([len(s) for _, s in series], dtype=np.int64)
+        # series i occupies [_offsets[i], _offsets[i + 1]) of the concatenated arrays
+        self._offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self._keys = np.concatenate([s.timestamps.astype(np.float64) - self.start_ms + i * self._stride
+                                     for i, (_, s) in enumerate(series)] or [np.empty(0)])
+        self._prices = np.concatenate([s.prices.astype(np.float64) for _, s in series] or [np.empty(0)])
+        # tick time of the first tick, set by it
+        self.origin_ms: Optional[int] = None
+
+    def replay_time(self, timestamp_ms: int) -> float:
+        """Point in the stored history played at tick time `timestamp_ms`"""
+        if self.origin_ms is None:
+            self.origin_ms = timestamp_ms
+        elapsed = max(timestamp_ms - self.origin_ms, 0) * self.speed
+        span = self.end_ms - self.start_ms
+        if span <= 0:
+            return self.start_ms
+        if self.loop:
+            return self.start_ms + elapsed % span
+        return self.start_ms + min(elapsed, span)
+
+    def initial_prices(self) -> Dict[str, float]:
+        return dict(zip(self.symbols, self._prices[self._offsets[:-1]].tolist()))
+
+    def interpolate(self, rows: np.ndarray, at: float) -> np.ndarray:
+        """Prices of the series at `rows` at history time `at`, as np.interp would give per series"""
+        targets = (at - self.start_ms) + rows * self._stride
+        first = self._offsets[rows]
+        last = self._offsets[rows + 1] - 1
+        after = np.searchsorted(self._keys, targets, side='right')
+        left = np.clip(after - 1, first, last)
+        right = np.clip(after, first, last)
+        left_keys, right_keys = self._keys[left], self._keys[right]
+        gap = right_keys - left_keys
+        weight = np.divide(targets - left_keys, gap, out=np.zeros_like(targets), where=gap > 0)
+        left_prices = self._prices[left]
+        return left_prices + np.clip(weight, 0, 1) * (self._prices[right] - left_prices)
+
+    def next_prices(self, symbols: Sequence[str], timestamp_ms: int) -> Dict[str, float]:
+        at = self.replay_time(timestamp_ms)
+        rows = np.fromiter((self._index[symbol] for symbol in symbols if symbol in self._index), dtype=np.int64)
+        if not len(rows):
+            return {}
+        prices = self.interpolate(rows, at)
+        return {self.symbols[i]: price for i, price in zip(rows.tolist(), prices.tolist())}
+
+
+def seed_prices(sample_data: Dict, store: Optional[TimeSeriesStore] = None) -> Dict[str, float]:
+    """Starting price per coin: its sample.json current price, else its last stored price"""
+    prices = {}
+    for coin_id, info in sample_data.items():
+        if not isinstance(info, dict):
+            continue
+        try:
+            price = float(info['market_data']['current_price'][VS_CURRENCY])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if price > 0:
+            prices[coin_id] = price
+    if store is not None:
+        for coin_id in store.coin_ids():
+            series = store.get(coin_id)
+            if coin_id not in prices and series is not None and len(series) and series.prices[-1] > 0:
+                prices[coin_id] = float(series.prices[-1])
+    return prices
+
+
+def create_price_feed(kind: str = PRICE_FEED, sample_data: Optional[Dict] = None,
+                      store: Optional[TimeSeriesStore] = None) -> FeedSource:
+    """Feed for a PRICE_FEED setting: 'simulated' or 'replay'"""
+    if kind == 'simulated':
+        return SimulatedFeed(seed_prices(sample_data or {}, store))
+    if kind == 'replay':
+        if store is None:
+            raise ValueError("The replay feed needs a time series store")
+        return ReplayFeed(store)
+    raise ValueError(f"Unsupported price feed: {kind}")
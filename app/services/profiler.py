@@ -0,0 +1,108 @@
+from collections import Counter
+from typing import List, Optional, Tuple
+import sys
+import threading
+import time
+from app.config.settings import PROFILER_INTERVAL, PROFILER_MAX_DEPTH
+
+try:
+    from eventlet import patcher as eventlet_patcher
+except ImportError:  # eventlet is only needed by the gunicorn workers
+    eventlet_patcher = None
+
+
+def os_threading():
+    """The threading module of real OS threads, also when eventlet has monkey patched it"""
+    if eventlet_patcher is not None and eventlet_patcher.is_monkey_patched('thread'):
+        return eventlet_patcher.original('threading')
+    return threading
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stacks of every thread from a background thread.
+
+    Samples are aggregated as collapsed stacks ("frame;frame;frame count"),
+    the input format of flamegraph.pl and speedscope. The sampled process
+    only pays for sys._current_frames() every `interval` seconds.
+
+    The sampler is a real OS thread even under eventlet's monkey patching,
+    where a green sampler would only ever see the hub. Each sample then
+    holds the stack of whichever greenlet is running on each thread (the hub
+    when idle); greenlets suspended on I/O are not sampled, so under eventlet
+    this is a CPU profile rather than a wall-clock one.
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL, max_depth: int = PROFILER_MAX_DEPTH):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._thread = None
+        self._threading = os_threading()
+        self._stop = self._threading.Event()
+        self._lock = self._threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> bool:
+        """Start sampling from scratch; False if it was already running"""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self.stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = self._threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> bool:
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return False
+            self._stop.set()
+            self._thread = None
+        thread.join()
+        self.stopped_at = time.time()
+        return True
+
+    def _run(self) -> None:
+        own_id = self._threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    if thread_id != own_id:
+                        self.stacks[self._collapse(frame)] += 1
+                self.samples += 1
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = self.stacks.most_common()
+        return ''.join(f"{stack} {count}\n" for stack, count in items)
+
+    def top(self, limit: int = 20) -> List[Tuple[str, int]]:
+        """Innermost frames by number of samples they were executing in"""
+        leaves = Counter()
+        with self._lock:
+            for stack, count in self.stacks.items():
+                leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+
+profiler = SamplingProfiler()
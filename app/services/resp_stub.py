@@ -0,0 +1,230 @@
+"""Local stand-in for the Redis commands used by the message bus.
+
+Speaks RESP2 and implements PING, AUTH, PUBLISH, SUBSCRIBE, UNSUBSCRIBE and
+QUIT, plus string keys with expiry (SET with NX/XX/PX/EX, GET, DEL, PEXPIRE)
+and EVAL of the two producer lease scripts, which is enough to run several
+workers against one elected price producer without a Redis install:
+
+    server = RespStub(); server.start()
+    bus = create_message_bus(server.url)
+"""
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+from typing import Dict, List, Optional, Set, Tuple
+import threading
+import time
+from app.services.message_bus import LEASE_RELEASE_SCRIPT, LEASE_RENEW_SCRIPT
+
+
+class _Server(ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class RespStub:
+    """Pub/sub and key-value RESP server running on a background thread"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self._channels: Dict[bytes, Set] = {}
+        # key -> (value, monotonic expiry or None)
+        self._keys: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self._server = _Server((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}"
+
+    def start(self) -> 'RespStub':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def publish(self, channel: bytes, payload: bytes) -> int:
+        with self._lock:
+            self.published += 1
+            subscribers = list(self._channels.get(channel, ()))
+        message = encode([b'message', channel, payload])
+        delivered = 0
+        for handler in subscribers:
+            if handler.write_frame(message):
+                delivered += 1
+        return delivered
+
+    def subscribe(self, channel: bytes, handler) -> None:
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(handler)
+
+    def unsubscribe(self, channel: bytes, handler) -> None:
+        with self._lock:
+            subscribers = self._channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(handler)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self._keys.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._keys[key]
+            return None
+        return value
+
+    def set(self, key: bytes, value: bytes, options: List[bytes]) -> Optional[bytes]:
+        """SET with NX/XX and PX/EX; the reply, None when NX/XX prevented it"""
+        options = [option.upper() for option in options]
+        expires_at = None
+        for unit, scale in ((b'PX', 0.001), (b'EX', 1.0)):
+            if unit in options:
+                expires_at = time.monotonic() + int(options[options.index(unit) + 1]) * scale
+        with self._lock:
+            exists = self._get(key) is not None
+            if (b'NX' in options and exists) or (b'XX' in options and not exists):
+                return None
+            self._keys[key] = (value, expires_at)
+        return b'OK'
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            return self._get(key)
+
+    def delete(self, keys: List[bytes]) -> int:
+        deleted = 0
+        with self._lock:
+            for key in keys:
+                if self._get(key) is not None:
+                    del self._keys[key]
+                    deleted += 1
+        return deleted
+
+    def pexpire(self, key: bytes, milliseconds: int) -> int:
+        with self._lock:
+            value = self._get(key)
+            if value is None:
+                return 0
+            self._keys[key] = (value, time.monotonic() + milliseconds / 1000.0)
+            return 1
+
+    def eval(self, script: bytes, keys: List[bytes], args: List[bytes]) -> int:
+        """The lease scripts of the message bus; other scripts are not supported"""
+        script = script.decode('utf-8')
+        if script not in (LEASE_RENEW_SCRIPT, LEASE_RELEASE_SCRIPT):
+            raise ValueError('ERR only the producer lease scripts are supported by the stub')
+        with self._lock:
+            if self._get(keys[0]) != args[0]:
+                return 0
+            if script == LEASE_RENEW_SCRIPT:
+                self._keys[keys[0]] = (args[0], time.monotonic() + int(args[1]) / 1000.0)
+            else:
+                del self._keys[keys[0]]
+            return 1
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.write_lock = threading.Lock()
+                self.channels: Set[bytes] = set()
+
+            def write_frame(self, frame: bytes) -> bool:
+                try:
+                    with self.write_lock:
+                        self.wfile.write(frame)
+                        self.wfile.flush()
+                    return True
+                except OSError:
+                    return False
+
+            def handle(self):
+                try:
+                    while True:
+                        command = read_command(self.rfile)
+                        if command is None:
+                            break
+                        name = command[0].upper() if command else b''
+                        if name == b'QUIT':
+                            self.write_frame(b'+OK\r\n')
+                            break
+                        self.write_frame(self.execute(name, command[1:]))
+                finally:
+                    for channel in list(self.channels):
+                        stub.unsubscribe(channel, self)
+
+            def execute(self, name: bytes, args: List[bytes]) -> bytes:
+                if name == b'PING':
+                    return encode(args[0]) if args else b'+PONG\r\n'
+                if name == b'AUTH':
+                    return b'+OK\r\n'
+                if name == b'PUBLISH' and len(args) == 2:
+                    return b':%d\r\n' % stub.publish(args[0], args[1])
+                if name in (b'SUBSCRIBE', b'UNSUBSCRIBE'):
+                    kind = name.lower()
+                    channels = args or list(self.channels)
+                    replies = []
+                    for channel in channels:
+                        if name == b'SUBSCRIBE':
+                            self.channels.add(channel)
+                            stub.subscribe(channel, self)
+                        else:
+                            self.channels.discard(channel)
+                            stub.unsubscribe(channel, self)
+                        replies.append(encode([kind, channel, len(self.channels)]))
+                    return b''.join(replies)
+                if name == b'SET' and len(args) >= 2:
+                    reply = stub.set(args[0], args[1], args[2:])
+                    return b'+OK\r\n' if reply else b'$-1\r\n'
+                if name == b'GET' and len(args) == 1:
+                    value = stub.get(args[0])
+                    return encode(value) if value is not None else b'$-1\r\n'
+                if name == b'DEL' and args:
+                    return encode(stub.delete(args))
+                if name == b'PEXPIRE' and len(args) == 2:
+                    return encode(stub.pexpire(args[0], int(args[1])))
+                if name == b'EVAL' and len(args) >= 2:
+                    count = int(args[1])
+                    try:
+                        return encode(stub.eval(args[0], args[2:2 + count], args[2 + count:]))
+                    except ValueError as e:
+                        return encode_error(str(e))
+                return encode_error(f"ERR unknown command '{name.decode('utf-8', 'replace')}'")
+
+        return Handler
+
+
+def read_command(stream):
+    """Read one RESP array of bulk strings (or an inline command), None at EOF"""
+    line = stream.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        return line.split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = stream.readline()
+        if not header.startswith(b'$'):
+            return None
+        args.append(stream.read(int(header[1:-2]) + 2)[:-2])
+    return args
+
+
+def encode(value) -> bytes:
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, list):
+        return b'*%d\r\n' % len(value) + b''.join(encode(item) for item in value)
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def encode_error(message: str) -> bytes:
+    return b'-' + message.encode('utf-8') + b'\r\n'
@@ -0,0 +1,123 @@
+"""Compact binary snapshot of the dataset that worker processes memory-map.
+
+Layout (little-endian):
+
+    8 bytes   magic b'BTSNAP01'
+    8 bytes   uint64 header length
+    N bytes   UTF-8 JSON header: source version, coin metadata and, per
+              coin, the point count and byte offset of its columns
+    padding   up to a 64 byte boundary
+    data      per coin: int64 timestamps, float64 prices, volumes, market caps
+
+Build one with: python compile_snapshot.py [source.json] [output.snap]
+"""
+from typing import Dict, Optional, Tuple
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+from app.services.timeseries_store import CoinSeries, TimeSeriesStore
+
+MAGIC = b'BTSNAP01'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+COLUMNS = (('timestamps', np.int64), ('prices', np.float64),
+           ('volumes', np.float64), ('market_caps', np.float64))
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def compile_snapshot(source_path: str, output_path: str, source_version: str = '') -> None:
+    """Compile a CoinGecko-shaped JSON dataset into a binary snapshot file"""
+    with open(source_path, 'r') as f:
+        sample_data = json.load(f)
+    store = TimeSeriesStore.from_historical(sample_data.pop('historical', {}) or {})
+
+    coins = {}
+    offset = 0
+    for coin_id in store:
+        length = len(store.get(coin_id))
+        coins[coin_id] = {'length': length, 'offset': offset}
+        offset = _aligned(offset + length * 8 * len(COLUMNS))
+
+    header = json.dumps({
+        'format_version': FORMAT_VERSION,
+        'source_version': source_version,
+        'metadata': sample_data,
+        'coins': coins
+    }).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    # write next to the target and rename so readers never map a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for coin_id, entry in coins.items():
+                series = store.get(coin_id)
+                f.seek(data_start + entry['offset'])
+                for name, dtype in COLUMNS:
+                    f.write(np.ascontiguousarray(getattr(series, name), dtype=np.dtype(dtype).newbyteorder('<')).tobytes())
+            f.truncate(data_start + offset)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def file_version(path: str) -> str:
+    """Cheap change marker for a file built from its mtime and size"""
+    try:
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    except OSError:
+        return "0"
+
+
+def read_source_version(path: str) -> Optional[str]:
+    """Source version recorded in a snapshot file, None if it is missing or unreadable"""
+    try:
+        return _read_header(path)[0]['source_version']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load_snapshot(path: str) -> Tuple[str, Dict, TimeSeriesStore]:
+    """Memory-map a snapshot read-only, returning (source version, metadata, store).
+
+    The store's columns are views into the shared mapping, so every process
+    that loads the same file shares its physical pages.
+    """
+    header, data_start = _read_header(path)
+    mapping = np.memmap(path, dtype=np.uint8, mode='r')
+
+    series = {}
+    for coin_id, entry in header['coins'].items():
+        length = entry['length']
+        start = data_start + entry['offset']
+        columns = []
+        for _, dtype in COLUMNS:
+            end = start + length * 8
+            columns.append(mapping[start:end].view(np.dtype(dtype).newbyteorder('<')))
+            start = end
+        series[coin_id] = CoinSeries(*columns)
+
+    return header['source_version'], header['metadata'], TimeSeriesStore(series)
+
+
+def _read_header(path: str) -> Tuple[Dict, int]:
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len).decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version: {header.get('format_version')}")
+    return header, _aligned(len(MAGIC) + 8 + header_len)
+
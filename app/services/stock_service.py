@@ -1,88 +1,423 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Tuple
+from typing import Callable, List, Dict, Any, Optional, Tuple
 import json
+import logging
 import os
+import numpy as np
 from app.config.settings import (
-    VS_CURRENCY, 
-    MAX_HISTORICAL_DAYS, DEFAULT_START_DATE
+    ROLLUP_INTERVALS, DATA_FILE, DATA_RELOAD_CHECK_INTERVAL,
+    DATA_SNAPSHOT_FILE, HISTORY_DB_PATH,
+    HISTORY_PRELOAD_DAYS, MAX_HISTORICAL_DAYS, MAX_STORED_HISTORY_DAYS, BATCH_POOL_WORKERS,
+    INDICATOR_CACHE_SIZE, CATALOG_REFRESH_INTERVAL
 )
+from app.services.timeseries_store import CoinSeries, TimeSeriesStore
+from app.services.candle_rollup import RollupCache
+from app.services.history_store import HistoryStore
+from app.services.metrics import KLINES_PHASE_SECONDS
+from app.services.symbol_catalog import SymbolCatalog, market_row_to_coin_info
+from app.services.snapshot_file import file_version, load_snapshot, read_source_version
+from app.utils.date_utils import validate_date_range, date_range_to_timestamps
+from app.utils.data_utils import compute_kline_columns, kline_rows
+from app.utils.candle_utils import normalize_interval, bucket_start, resample_ohlcv
+from app.utils.indicator_utils import IndicatorSpec, compute_indicators
+import threading
 import time
 
+logger = logging.getLogger(__name__)
+
+SELECT_PHASE = KLINES_PHASE_SECONDS.labels('select')
+INDICATORS_PHASE = KLINES_PHASE_SECONDS.labels('indicators')
+FORMAT_PHASE = KLINES_PHASE_SECONDS.labels('format')
+
+class DataSnapshot:
+    """One loaded version of the dataset.
+
+    A snapshot is never modified by a reload; the service swaps in a new
+    one, so readers holding a reference keep a consistent view. Ingested prices
+    are appended to the current snapshot's store and rollups.
+    """
+
+    __slots__ = ('version', 'sample_data', 'store', 'rollups')
+
+    def __init__(self, version: str, sample_data: Dict, store: TimeSeriesStore, rollups: RollupCache):
+        self.version = version
+        self.sample_data = sample_data
+        self.store = store
+        self.rollups = rollups
+
+
 class CryptoService:
-    def __init__(self):
-        self.sample_data = self._load_sample_data()
+    def __init__(self, data_file: str = DATA_FILE, snapshot_file: Optional[str] = DATA_SNAPSHOT_FILE,
+                 history_db_path: Optional[str] = HISTORY_DB_PATH):
+        self.data_file = data_file
+        self.snapshot_file = snapshot_file
+        self.history_store = self._open_history_store(history_db_path)
+        self._preload_since_ms = 0
+        # whether the history store holds any points, which lifts the range limit to MAX_STORED_HISTORY_DAYS
+        self._has_stored_history = False
+        self._ingest_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._last_reload_check = time.monotonic()
+        self._indicator_cache = OrderedDict()
+        self._indicator_lock = threading.Lock()
+        self._batch_pool = ThreadPoolExecutor(max_workers=BATCH_POOL_WORKERS, thread_name_prefix='klines-batch')
+        # /coins/markets rows from ingestion, covering coins without history
+        self._market_metadata: Dict[str, Dict] = {}
+        self._catalog: Optional[SymbolCatalog] = None
+        self._catalog_lock = threading.Lock()
+        self._catalog_stale = False
+        self._catalog_builds = 0
+        self._snapshot = self._build_snapshot()
+
+    @property
+    def snapshot(self) -> DataSnapshot:
+        return self._snapshot
+
+    @property
+    def sample_data(self) -> Dict:
+        return self._snapshot.sample_data
+
+    @property
+    def store(self) -> TimeSeriesStore:
+        return self._snapshot.store
+
+    @property
+    def rollups(self) -> RollupCache:
+        return self._snapshot.rollups
+
+    def _build_snapshot(self) -> DataSnapshot:
+        version = file_version(self.data_file)
+        loaded = self._load_snapshot_file(version)
+        if loaded is not None:
+            version, sample_data, store = loaded
+        else:
+            sample_data = self._load_sample_data()
+            # historical lists are only needed to build the columnar store
+            store = TimeSeriesStore.from_historical(sample_data.pop('historical', {}) or {})
+        self._preload_history(store)
+        rollups = RollupCache.from_store(store, ROLLUP_INTERVALS)
+        return DataSnapshot(version, sample_data, store, rollups)
+
+    def _open_history_store(self, path: Optional[str]) -> Optional[HistoryStore]:
+        if not path:
+            return None
+        try:
+            return HistoryStore(path)
+        except Exception as e:
+            logger.error("Error opening history store: %s", e)
+            return None
+
+    def _preload_history(self, store: TimeSeriesStore) -> None:
+        """Append recent points from the history store that are newer than the dataset"""
+        if self.history_store is None:
+            return
+        try:
+            since_ms = int((time.time() - HISTORY_PRELOAD_DAYS * 24 * 60 * 60) * 1000)
+            self._preload_since_ms = since_ms
+            coin_ids = self.history_store.coin_ids()
+            self._has_stored_history = bool(coin_ids)
+            for coin_id in coin_ids:
+                series = store.get_or_create(coin_id)
+                start_ms = since_ms if not len(series) else max(since_ms, series.last_timestamp + 1)
+                series.extend(self.history_store.load(coin_id, start_ms))
+        except Exception as e:
+            logger.error("Error loading stored history: %s", e)
+
+    def _load_snapshot_file(self, version: str) -> Optional[Tuple[str, Dict, TimeSeriesStore]]:
+        """Memory-map the compiled snapshot of the data file; None when it is missing or stale"""
+        if not self.snapshot_file:
+            return None
+        try:
+            snapshot_version = read_source_version(self.snapshot_file)
+            if snapshot_version is None:
+                return None
+            if snapshot_version != version and os.path.exists(self.data_file):
+                logger.warning("Data snapshot %s is stale, reading %s instead; rebuild it with compile_snapshot.py",
+                               self.snapshot_file, self.data_file)
+                return None
+            return load_snapshot(self.snapshot_file)
+        except Exception as e:
+            logger.error("Error loading data snapshot: %s", e)
+            return None
 
     def _load_sample_data(self) -> Dict:
         """Load sample data from JSON file"""
         try:
-            file_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'sample.json')
-            with open(file_path, 'r') as f:
+            with open(self.data_file, 'r') as f:
                 return json.load(f)
         except Exception as e:
-            print(f"Error loading sample data: {e}")
+            logger.error("Error loading sample data: %s", e)
             return {}
 
+    def reload(self) -> DataSnapshot:
+        """Load the data file into a new snapshot and swap it in"""
+        with self._reload_lock:
+            snapshot = self._build_snapshot()
+            with self._ingest_lock:
+                # carry over live ticks newer than the reloaded history
+                current = self._snapshot
+                for coin_id in current.store:
+                    series = snapshot.store.get_or_create(coin_id)
+                    if series.extend(current.store.get(coin_id)):
+                        snapshot.rollups.rebuild(coin_id, series)
+                self._snapshot = snapshot
+            return snapshot
+
+    def reload_if_changed(self) -> bool:
+        """Reload when the data file changed, checking at most every DATA_RELOAD_CHECK_INTERVAL seconds"""
+        now = time.monotonic()
+        if now - self._last_reload_check < DATA_RELOAD_CHECK_INTERVAL:
+            return False
+        self._last_reload_check = now
+        if file_version(self.data_file) == self._snapshot.version:
+            return False
+        try:
+            self.reload()
+            return True
+        except Exception as e:
+            logger.error("Error reloading data: %s", e)
+            return False
+
+    def data_version(self, coin_id: Optional[str] = None, until_ms: Optional[int] = None) -> str:
+        """Version of the data a response depends on.
+
+        Points are only ever appended, so a window ending before a coin's
+        newest point only changes when the snapshot is reloaded.
+        """
+        snapshot = self._snapshot
+        if coin_id is None:
+            return snapshot.version
+        if self.is_window_closed(coin_id, until_ms):
+            return f"{snapshot.version}:closed"
+        series = snapshot.store.get(coin_id)
+        return f"{snapshot.version}:{len(series) if series is not None else 0}"
+
+    def is_window_closed(self, coin_id: str, until_ms: Optional[int]) -> bool:
+        """Whether a window ending at until_ms lies before the coin's newest point"""
+        series = self._snapshot.store.get(coin_id)
+        return (until_ms is not None and series is not None and len(series) > 0
+                and until_ms < series.last_timestamp)
+
+    def ingest_tick(self, coin_id: str, timestamp_ms: int, price: float, volume: float = 0.0,
+                    market_cap: Optional[float] = None) -> bool:
+        """Append a live price from ingestion to the store and fold it into the candle rollups"""
+        with self._ingest_lock:
+            snapshot = self._snapshot
+            series = snapshot.store.get_or_create(coin_id)
+            if market_cap is None:
+                market_cap = float(series.market_caps[-1]) if len(series) else 0.0
+            if not series.append(timestamp_ms, price, volume, market_cap):
+                return False
+            snapshot.rollups.update(coin_id, timestamp_ms, price, volume, market_cap)
+            return True
+
     def get_crypto_price(self, coin_id: str) -> float:
         """Get current cryptocurrency price"""
         try:
-            if coin_id in self.sample_data:
-                return float(self.sample_data[coin_id]['market_data']['current_price']['usd'])
+            sample_data = self.sample_data
+            if coin_id in sample_data:
+                return float(sample_data[coin_id]['market_data']['current_price']['usd'])
             return 0
         except Exception as e:
-            print(f"Error getting crypto price for {coin_id}: {e}")
+            logger.error("Error getting crypto price for %s: %s", coin_id, e)
             return 0
 
     def get_symbols_data(self, coin_ids: List[str]) -> List[Dict[str, str]]:
         """Get data for multiple cryptocurrencies"""
         try:
+            sample_data = self.sample_data
             symbols_data = []
             for coin_id in coin_ids:
-                if coin_id in self.sample_data:
+                if coin_id in sample_data:
                     symbols_data.append({
                         "symbol": coin_id,
-                        "price": str(self.sample_data[coin_id]['market_data']['current_price']['usd'])
+                        "price": str(sample_data[coin_id]['market_data']['current_price']['usd'])
                     })
             return symbols_data
         except Exception as e:
-            print(f"Error getting symbols data: {e}")
+            logger.error("Error getting symbols data: %s", e)
             return []
 
+    def update_market_metadata(self, rows: List[Dict]) -> int:
+        """Merge CoinGecko /coins/markets rows into the symbol catalog's metadata"""
+        updated = {row['id']: market_row_to_coin_info(row) for row in rows if row.get('id')}
+        self._market_metadata = {**self._market_metadata, **updated}
+        self._catalog_stale = True
+        return len(updated)
+
+    def _build_catalog(self) -> SymbolCatalog:
+        self._catalog_stale = False
+        snapshot = self.snapshot
+        coins = dict(self._market_metadata)
+        coins.update((coin_id, info) for coin_id, info in snapshot.sample_data.items()
+                     if isinstance(info, dict) and coin_id not in coins)
+        self._catalog_builds += 1
+        catalog = SymbolCatalog.build(coins, snapshot.store, f"{snapshot.version}:{self._catalog_builds}",
+                                      self._catalog)
+        self._catalog = catalog
+        return catalog
+
+    def _refresh_catalog(self) -> None:
+        try:
+            self._build_catalog()
+        except Exception as e:
+            logger.error("Error building symbol catalog: %s", e)
+        finally:
+            self._catalog_lock.release()
+
+    def get_catalog(self) -> SymbolCatalog:
+        """Current symbol catalog.
+
+        Only the first build happens in the caller. Afterwards a stale catalog
+        (older than CATALOG_REFRESH_INTERVAL, from a previous data snapshot or
+        with new market metadata) keeps being served while the next one is
+        built on the batch pool.
+        """
+        catalog = self._catalog
+        if catalog is None:
+            with self._catalog_lock:
+                return self._catalog or self._build_catalog()
+        stale = (self._catalog_stale or not catalog.version.startswith(f"{self.snapshot.version}:")
+                 or time.monotonic() - catalog.built_at > CATALOG_REFRESH_INTERVAL)
+        if stale and self._catalog_lock.acquire(blocking=False):
+            self._batch_pool.submit(self._refresh_catalog)
+        return catalog
+
     def validate_date_range(self, start_date: str, end_date: str) -> Tuple[str, str, str]:
         """Validate and adjust date range based on API limitations"""
-        try:
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            today = datetime.now()
+        max_days = MAX_STORED_HISTORY_DAYS if self._has_stored_history else MAX_HISTORICAL_DAYS
+        return validate_date_range(start_date, end_date, max_days)
 
-            # check date
-            if end_dt > today:
-                end_dt = today
-                end_date = end_dt.strftime('%Y-%m-%d')
+    def last_stored_timestamp(self, coin_id: str) -> Optional[int]:
+        """Timestamp (ms) of the newest persisted point, where ingestion should resume"""
+        if self.history_store is not None:
+            return self.history_store.last_timestamp(coin_id)
+        series = self.store.get(coin_id)
+        return series.last_timestamp if series is not None else None
 
-            date_range = (end_dt - start_dt).days
+    def ingest_history(self, coin_id: str, market_data: Dict) -> int:
+        """Persist a market_chart payload and merge it into the store, returning the number of new points"""
+        incoming = CoinSeries.from_market_chart(market_data)
+        if self.history_store is not None and self.history_store.append(coin_id, incoming):
+            self._has_stored_history = True
+        with self._ingest_lock:
+            snapshot = self._snapshot
+            series = snapshot.store.get_or_create(coin_id)
+            added = series.extend(incoming)
+            if added:
+                snapshot.rollups.rebuild(coin_id, series)
+            return added
 
-            if date_range > MAX_HISTORICAL_DAYS:
-                start_dt = end_dt - timedelta(days=MAX_HISTORICAL_DAYS-1)
-                start_date = start_dt.strftime('%Y-%m-%d')
-                message = f"Date range exceeded maximum allowed ({MAX_HISTORICAL_DAYS} days). Adjusted to last {MAX_HISTORICAL_DAYS} days."
-            else:
-                message = ""
+    def _get_candles(self, snapshot: DataSnapshot, coin_id: str, series, interval: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        """OHLCV candles for the date window, from the rollups when available"""
+        start_ms, end_ms = date_range_to_timestamps(start_date, end_date)
+        # widen the window so the first candle is complete
+        start_ms = int(bucket_start(start_ms, interval))
 
-            return start_date, end_date, message
+        if self.history_store is not None and start_ms < self._preload_since_ms:
+            # only recent history is kept in memory, read older windows from disk
+            stored = self.history_store.load(coin_id, start_ms, end_ms)
+            if len(stored):
+                newer = series.window(stored.last_timestamp + 1, end_ms)
+                window = CoinSeries.concatenate([stored, newer])
+                prev_close = self.history_store.price_before(coin_id, start_ms)
+                return self._resample(window, interval, prev_close)
 
-        except ValueError as e:
-            print(f"Error validating dates: {e}")
-            return DEFAULT_START_DATE, end_date, "Invalid date format. Using default date range."
+        rollup = snapshot.rollups.get(coin_id, interval)
+        if rollup is not None:
+            return rollup.window(start_ms, end_ms)
 
-    def get_historical_data(self, coin_id: str, start_date: str, end_date: str, interval: str = 'daily') -> Dict[str, Any]:
-        """Get historical data for a cryptocurrency"""
+        lo, hi = series.index_range(start_ms, end_ms)
+        # close of the previous candle is the last point before the window
+        return self._resample(series.slice(lo, hi), interval,
+                              float(series.prices[lo - 1]) if lo > 0 else None)
+
+    def _resample(self, window, interval: str, prev_close: Optional[float]) -> Dict[str, Any]:
+        candles = resample_ohlcv(window.timestamps, window.prices, window.volumes,
+                                 window.market_caps, interval)
+        candles['prev_close'] = prev_close
+        return candles
+
+    def get_indicators(self, coin_id: str, interval: str, specs: List[IndicatorSpec]) -> Dict[str, np.ndarray]:
+        """Indicator columns over every in-memory candle of a coin, plus their `timestamps`.
+
+        Results are cached per coin, interval, data version and indicator
+        set, so concurrent requests for the same chart share one computation.
+        """
+        snapshot = self._snapshot
+        key = (coin_id, interval, self.data_version(coin_id), tuple(specs))
+        with self._indicator_lock:
+            cached = self._indicator_cache.get(key)
+            if cached is not None:
+                self._indicator_cache.move_to_end(key)
+                return cached
+
+        rollup = snapshot.rollups.get(coin_id, interval)
+        if rollup is not None:
+            candles = rollup.window()
+        else:
+            series = snapshot.store.get(coin_id)
+            if series is None:
+                series = CoinSeries.empty()
+            candles = resample_ohlcv(series.timestamps, series.prices, series.volumes,
+                                     series.market_caps, interval)
+        indicators = compute_indicators(candles, specs)
+        indicators['timestamps'] = candles['timestamps']
+
+        with self._indicator_lock:
+            self._indicator_cache[key] = indicators
+            while len(self._indicator_cache) > INDICATOR_CACHE_SIZE:
+                self._indicator_cache.popitem(last=False)
+        return indicators
+
+    def _window_indicators(self, coin_id: str, interval: str, candles: Dict[str, Any],
+                           specs: List[IndicatorSpec]) -> Dict[str, np.ndarray]:
+        """Indicators for the candles of a window, sliced from the full-series computation"""
+        full = self.get_indicators(coin_id, interval, specs)
+        timestamps = full['timestamps']
+        positions = np.searchsorted(timestamps, candles['timestamps'])
+        if len(positions) and (not len(timestamps) or positions[-1] >= len(timestamps)
+                               or (timestamps[positions] != candles['timestamps']).any()):
+            # window is not covered by the in-memory candles (older history read from disk)
+            return compute_indicators(candles, specs)
+        return {name: column[positions] for name, column in full.items() if name != 'timestamps'}
+
+    def get_kline_columns(self, coin_id: str, start_date: str, end_date: str, interval: str = 'daily',
+                          indicators: Optional[List[IndicatorSpec]] = None) -> Dict[str, Any]:
+        """Get historical data for a cryptocurrency as columns.
+
+        Returns {'columns', 'coin_info', 'info'}; on failure `columns` is None
+        and info carries the error.
+        """
         try:
+            started = time.perf_counter()
             start_date, end_date, message = self.validate_date_range(start_date, end_date)
 
+            interval_key = normalize_interval(interval)
+            if interval_key is None:
+                return {
+                    'columns': None,
+                    'info': {
+                        'start_date': start_date,
+                        'end_date': end_date,
+                        'error': f"Unsupported interval: {interval}"
+                    }
+                }
+
             # get data
-            if coin_id not in self.sample_data.get('historical', {}):
+            snapshot = self.snapshot
+            series = snapshot.store.get(coin_id)
+            stored_last = None
+            if self.history_store is not None and (series is None or not len(series)):
+                # only coins with nothing in memory need the database to tell whether older history exists
+                stored_last = self.history_store.last_timestamp(coin_id)
+            if series is None and stored_last is not None:
+                series = CoinSeries.empty()
+            if series is None:
                 return {
-                    'data': [],
+                    'columns': None,
                     'info': {
                         'start_date': start_date,
                         'end_date': end_date,
@@ -90,80 +425,97 @@ class CryptoService:
                     }
                 }
 
-            market_data = self.sample_data['historical'][coin_id]
-            coin_info = self.sample_data[coin_id]
+            coin_info = snapshot.sample_data.get(coin_id, {})
 
-            formatted_data = []
-            if not market_data.get('prices'):
+            if not len(series) and stored_last is None:
                 return {
-                    'data': [],
+                    'columns': None,
                     'info': {
                         'start_date': start_date,
                         'end_date': end_date,
                         'error': "No price data available"
                     }
                 }
-            
-            prices = market_data['prices']
-            volumes = market_data.get('total_volumes', [])
-            market_caps = market_data.get('market_caps', [])
-
-            prices_len = len(prices)
-            volumes_len = len(volumes)
-            market_caps_len = len(market_caps)
-
-            for i in range(prices_len):
-                timestamp = int(prices[i][0] / 1000) 
-                price = prices[i][1]
-                volume = volumes[i][1] if i < volumes_len else 0
-                market_cap = market_caps[i][1] if i < market_caps_len else 0
-
-                prev_price = prices[i-1][1] if i > 0 else price
-                change = price - prev_price
-                change_percent = (change / prev_price * 100) if prev_price > 0 else 0
-
-                kline_data = {
-                    'time': timestamp,
-                    'trading_date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d'),
-                    'price': float(price),
-                    'volume': float(volume),
-                    'market_cap': float(market_cap),
-                    'change': float(change),
-                    'change_percent': float(change_percent)
-                }
-
-              
-                if i == prices_len - 1:
-                    kline_data.update({
-                        'name': coin_info.get('name', ''),
-                        'symbol': coin_info.get('symbol', '').upper(),
-                        'market_cap_rank': coin_info.get('market_cap_rank', 0),
-                        'total_supply': float(coin_info.get('market_data', {}).get('total_supply', 0) or 0),
-                        'max_supply': float(coin_info.get('market_data', {}).get('max_supply', 0) or 0),
-                        'circulating_supply': float(coin_info.get('market_data', {}).get('circulating_supply', 0) or 0),
-                        'ath': float(coin_info.get('market_data', {}).get('ath', {}).get(VS_CURRENCY, 0) or 0),
-                        'atl': float(coin_info.get('market_data', {}).get('atl', {}).get(VS_CURRENCY, 0) or 0),
-                        'ath_change_percentage': float(coin_info.get('market_data', {}).get('ath_change_percentage', {}).get(VS_CURRENCY, 0) or 0),
-                        'atl_change_percentage': float(coin_info.get('market_data', {}).get('atl_change_percentage', {}).get(VS_CURRENCY, 0) or 0)
-                    })
 
-                formatted_data.append(kline_data)
+            candles = self._get_candles(snapshot, coin_id, series, interval_key, start_date, end_date)
+            columns = compute_kline_columns(
+                candles['timestamps'], candles['close'], candles['volume'],
+                candles['market_cap'], candles['prev_close']
+            )
+            for field in ('open', 'high', 'low', 'close'):
+                columns[field] = candles[field]
+            SELECT_PHASE.observe(time.perf_counter() - started)
+            if indicators:
+                with INDICATORS_PHASE.time():
+                    columns.update(self._window_indicators(coin_id, interval_key, candles, indicators))
 
             return {
-                'data': formatted_data,
+                'columns': columns,
+                'coin_info': coin_info,
                 'info': {
                     'start_date': start_date,
                     'end_date': end_date,
+                    'interval': interval_key,
                     'message': message if message else None
                 }
             }
         except Exception as e:
-            print(f"Error getting historical data for {coin_id}: {e}")
+            logger.error("Error getting historical data for %s: %s", coin_id, e)
             return {
-                'data': [],
+                'columns': None,
                 'info': {
                     'start_date': start_date,
                     'end_date': end_date,
                     'error': str(e)
                 }
-            } 
\ No newline at end of file
+            }
+
+    def get_historical_data(self, coin_id: str, start_date: str, end_date: str, interval: str = 'daily',
+                            indicators: Optional[List[IndicatorSpec]] = None) -> Dict[str, Any]:
+        """Get historical data for a cryptocurrency"""
+        result = self.get_kline_columns(coin_id, start_date, end_date, interval, indicators)
+        if result['columns'] is None:
+            return {'data': [], 'info': result['info']}
+        with FORMAT_PHASE.time():
+            data = kline_rows(result['columns'], result['coin_info'])
+        return {
+            'data': data,
+            'info': result['info']
+        }
+
+    def get_historical_data_batch(self, coin_ids: List[str], start_date: str, end_date: str, interval: str = 'daily',
+                                  formatter: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                                  indicators: Optional[List[IndicatorSpec]] = None) -> Dict[str, Any]:
+        """Get historical data for several cryptocurrencies over one shared window.
+
+        The range is validated once; each coin is assembled on the batch pool
+        and passed through `formatter` (rows by default). Coins that fail get
+        an entry with `error` instead of failing the whole batch.
+        """
+        start_date, end_date, message = self.validate_date_range(start_date, end_date)
+        interval_key = normalize_interval(interval)
+        info = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'interval': interval_key,
+            'message': message if message else None
+        }
+        if interval_key is None:
+            info['error'] = f"Unsupported interval: {interval}"
+            return {'results': {}, 'info': info}
+
+        def build(coin_id: str) -> Dict[str, Any]:
+            result = self.get_kline_columns(coin_id, start_date, end_date, interval_key, indicators)
+            if result['columns'] is None:
+                return {'error': result['info']['error'], 'info': result['info']}
+            if formatter is not None:
+                return formatter(result)
+            return {'data': kline_rows(result['columns'], result['coin_info']), 'info': result['info']}
+
+        if len(coin_ids) > 1:
+            results = self._batch_pool.map(build, coin_ids)
+        else:
+            results = map(build, coin_ids)
+        return {'results': dict(zip(coin_ids, results)), 'info': info}
+
+crypto_service = CryptoService()
@@ -0,0 +1,94 @@
+from collections import deque
+from typing import Dict, Iterable, Optional
+from app.config.settings import STREAMING_EMA_PERIODS, STREAMING_RSI_PERIOD, STREAMING_STATS_WINDOW
+
+
+class StreamingIndicators:
+    """Indicator state for one symbol, updated in O(1) per tick.
+
+    EMA and RSI follow the same recurrences as the /api/klines indicator
+    engine (EMA seeded with the first price, RSI with Wilder's smoothing),
+    so a value matches the batch computation over the same prices. Rolling
+    stats keep running sums over a fixed window and monotonic deques for
+    the min and max. Values stay None until enough ticks have been seen.
+    """
+
+    __slots__ = ('ema_periods', 'ema_alphas', 'emas', 'rsi_period', 'avg_gain', 'avg_loss',
+                 'last_price', 'count', 'window', 'ring', 'total', 'total_sq', 'mins', 'maxs')
+
+    def __init__(self, ema_periods: Iterable[int] = STREAMING_EMA_PERIODS, rsi_period: int = STREAMING_RSI_PERIOD,
+                 window: int = STREAMING_STATS_WINDOW):
+        self.ema_periods = tuple(ema_periods)
+        self.ema_alphas = [2.0 / (period + 1) for period in self.ema_periods]
+        self.emas = [0.0] * len(self.ema_periods)
+        self.rsi_period = rsi_period
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.last_price: Optional[float] = None
+        self.count = 0
+        self.window = window
+        self.ring = [0.0] * window
+        self.total = 0.0
+        self.total_sq = 0.0
+        # (tick index, price), increasing for mins and decreasing for maxs
+        self.mins = deque()
+        self.maxs = deque()
+
+    def update(self, price: float) -> Dict[str, Optional[float]]:
+        """Fold a new price into every indicator and return the current values"""
+        price = float(price)
+        index = self.count
+        if self.last_price is None:
+            self.emas = [price] * len(self.emas)
+        else:
+            self.emas = [ema + alpha * (price - ema) for ema, alpha in zip(self.emas, self.ema_alphas)]
+            delta = price - self.last_price
+            alpha = 1.0 / self.rsi_period
+            if index == 1:
+                self.avg_gain = max(delta, 0.0)
+                self.avg_loss = max(-delta, 0.0)
+            else:
+                self.avg_gain += alpha * (max(delta, 0.0) - self.avg_gain)
+                self.avg_loss += alpha * (max(-delta, 0.0) - self.avg_loss)
+        self.last_price = price
+
+        slot = index % self.window
+        if index >= self.window:
+            evicted = self.ring[slot]
+            self.total -= evicted
+            self.total_sq -= evicted * evicted
+        self.ring[slot] = price
+        self.total += price
+        self.total_sq += price * price
+        while self.mins and self.mins[-1][1] >= price:
+            self.mins.pop()
+        self.mins.append((index, price))
+        while self.maxs and self.maxs[-1][1] <= price:
+            self.maxs.pop()
+        self.maxs.append((index, price))
+        expired = index - self.window
+        if self.mins[0][0] <= expired:
+            self.mins.popleft()
+        if self.maxs[0][0] <= expired:
+            self.maxs.popleft()
+
+        self.count = index + 1
+        return self.values()
+
+    def values(self) -> Dict[str, Optional[float]]:
+        values = {}
+        for period, ema in zip(self.ema_periods, self.emas):
+            values[f"ema_{period}"] = ema if self.count >= period else None
+
+        rsi = None
+        if self.count > self.rsi_period:
+            rsi = 100.0 if self.avg_loss == 0 else 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+        values[f"rsi_{self.rsi_period}"] = rsi
+
+        full = self.count >= self.window
+        mean = self.total / self.window if full else None
+        values[f"sma_{self.window}"] = mean
+        values[f"std_{self.window}"] = max(self.total_sq / self.window - mean * mean, 0.0) ** 0.5 if full else None
+        values[f"min_{self.window}"] = self.mins[0][1] if full else None
+        values[f"max_{self.window}"] = self.maxs[0][1] if full else None
+        return values
@@ -0,0 +1,274 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+import json
+import time
+import numpy as np
+from app.config.settings import VS_CURRENCY
+from app.services.timeseries_store import TimeSeriesStore
+from app.utils.data_utils import get_coin_extra_info
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# sort name -> entry field, every order is precomputed ascending and descending
+SORT_FIELDS = {
+    'market_cap': 'market_cap',
+    'change_24h': 'change_24h',
+    'volume': 'volume_24h'
+}
+
+# (sort value, negated for descending orders and inf when missing; coin id)
+SortKey = Tuple[float, str]
+
+
+def _number(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+
+def _quote(market_data: Dict, field: str) -> Optional[float]:
+    value = market_data.get(field)
+    return _number(value.get(VS_CURRENCY) if isinstance(value, dict) else value)
+
+
+def market_row_to_coin_info(row: Dict) -> Dict:
+    """A CoinGecko /coins/markets row in the sample.json coin shape"""
+    return {
+        'id': row.get('id'),
+        'name': row.get('name'),
+        'symbol': row.get('symbol'),
+        'market_cap_rank': row.get('market_cap_rank'),
+        'market_data': {
+            'current_price': {VS_CURRENCY: row.get('current_price')},
+            'market_cap': {VS_CURRENCY: row.get('market_cap')},
+            'total_volume': {VS_CURRENCY: row.get('total_volume')},
+            'price_change_percentage_24h': row.get('price_change_percentage_24h'),
+            'total_supply': row.get('total_supply'),
+            'max_supply': row.get('max_supply'),
+            'circulating_supply': row.get('circulating_supply'),
+            'ath': {VS_CURRENCY: row.get('ath')},
+            'atl': {VS_CURRENCY: row.get('atl')},
+            'ath_change_percentage': {VS_CURRENCY: row.get('ath_change_percentage')},
+            'atl_change_percentage': {VS_CURRENCY: row.get('atl_change_percentage')}
+        }
+    }
+
+
+def catalog_entry(coin_id: str, coin_info: Dict, series=None) -> Dict[str, Any]:
+    """Metadata of one coin with price, market cap, volume and 24h change.
+
+    The live series wins over the quoted market data where it has points;
+    volumes there are CoinGecko's rolling 24h volume.
+    """
+    market_data = coin_info.get('market_data') or {}
+    price = _quote(market_data, 'current_price')
+    market_cap = _quote(market_data, 'market_cap')
+    volume = _quote(market_data, 'total_volume')
+    change = _number(market_data.get('price_change_percentage_24h'))
+    if series is not None and len(series):
+        price = _number(series.prices[-1])
+        market_cap = _number(series.market_caps[-1]) or market_cap
+        volume = _number(series.volumes[-1]) or volume
+        before = int(np.searchsorted(series.timestamps, series.timestamps[-1] - DAY_MS, side='right')) - 1
+        if price is not None and 0 <= before < len(series) - 1 and _number(series.prices[before]):
+            change = (price / float(series.prices[before]) - 1) * 100
+
+    entry = {'id': coin_id}
+    entry.update(get_coin_extra_info(coin_info))
+    entry['name'] = entry['name'] or coin_id
+    entry.update({
+        'price': price,
+        'market_cap': market_cap,
+        'volume_24h': volume,
+        'change_24h': round(change, 4) if change is not None else None
+    })
+    return entry
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def encode_cursor(sort: str, descending: bool, key: SortKey) -> str:
+    value, coin_id = key
+    raw = json.dumps([sort, descending, value if np.isfinite(value) else None, coin_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> SortKey:
+    """Sort key of the last item of the previous page; ValueError if invalid or for another ordering"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_descending, value, coin_id = json.loads(raw)
+        key = (float('inf') if value is None else float(value), str(coin_id))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if cursor_sort != sort or cursor_descending != descending:
+        raise ValueError('Cursor belongs to a different sort order')
+    return key
+
+
+class SymbolCatalog:
+    """Read-only, indexed view of the coin universe for search and ranked listing.
+
+    Built from the coin metadata and live series, then shared by every
+    request until the service builds the next one:
+
+    - a sorted list of lowercased ids, symbols, names and name words,
+      searched with bisect for prefixes;
+    - a trigram -> coins posting index for substring search, where the
+      postings of the query's trigrams are intersected before the candidates
+      are checked;
+    - every sort order as an array of coins plus their sorted keys, so a
+      page is a binary search to the cursor and a slice.
+
+    Entries are kept in id order, which breaks ties in every sort order.
+    Cursors hold the sort key of the last item, so pages stay consistent
+    when the catalog is rebuilt between requests. Rebuilds with the same
+    coins reuse the search index and the entries of coins without series.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], version: str = '', previous: Optional['SymbolCatalog'] = None):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.entries = sorted(entries, key=lambda entry: entry['id'])
+        self.ids = np.array([entry['id'] for entry in self.entries], dtype=str)
+        self._index = {entry['id']: i for i, entry in enumerate(self.entries)}
+        self._search_fields = [(entry['id'], entry['symbol'], entry['name']) for entry in self.entries]
+        # metadata objects the entries came from, set by build() to spot unchanged coins on the next build
+        self._sources: Dict[str, Dict] = {}
+        if previous is not None and previous._search_fields == self._search_fields:
+            self._prefix_keys = previous._prefix_keys
+            self._prefix_coins = previous._prefix_coins
+            self._postings = previous._postings
+            self._search_text = previous._search_text
+        else:
+            self._build_search_index()
+        self._orders: Dict[Tuple[str, bool], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for sort, field in SORT_FIELDS.items():
+            values = np.array([np.inf if entry[field] is None else entry[field] for entry in self.entries],
+                              dtype=np.float64)
+            for descending in (True, False):
+                self._orders[(sort, descending)] = self._build_order(values, descending)
+
+    @classmethod
+    def build(cls, coins: Dict[str, Dict], store: Optional[TimeSeriesStore] = None, version: str = '',
+              previous: Optional['SymbolCatalog'] = None) -> 'SymbolCatalog':
+        """Catalog of `coins` (coin id -> metadata in the sample.json shape) and every coin in `store`"""
+        coin_ids = list(coins)
+        if store is not None:
+            coin_ids.extend(coin_id for coin_id in store.coin_ids() if coin_id not in coins)
+        sources = {}
+        entries = []
+        for coin_id in coin_ids:
+            coin_info = coins.get(coin_id) or {}
+            series = store.get(coin_id) if store is not None else None
+            sources[coin_id] = coin_info
+            if series is None and previous is not None and previous._sources.get(coin_id) is coin_info:
+                entries.append(previous.get(coin_id))
+            else:
+                entries.append(catalog_entry(coin_id, coin_info, series))
+        catalog = cls(entries, version, previous)
+        catalog._sources = sources
+        return catalog
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, coin_id: str) -> Optional[Dict[str, Any]]:
+        index = self._index.get(coin_id)
+        return self.entries[index] if index is not None else None
+
+    def _build_search_index(self) -> None:
+        prefix_pairs = []
+        postings = defaultdict(list)
+        self._search_text = []
+        for i, (coin_id, symbol, name) in enumerate(self._search_fields):
+            name = (name or '').lower()
+            fields = {coin_id.lower(), (symbol or '').lower(), name}
+            fields.update(name.split())
+            fields.discard('')
+            prefix_pairs.extend((field, i) for field in fields)
+            text = '\n'.join(fields)
+            self._search_text.append(text)
+            for trigram in _trigrams(text):
+                postings[trigram].append(i)
+        prefix_pairs.sort()
+        self._prefix_keys = [key for key, _ in prefix_pairs]
+        self._prefix_coins = np.fromiter((i for _, i in prefix_pairs), dtype=np.int64, count=len(prefix_pairs))
+        self._postings = {trigram: np.asarray(coins, dtype=np.int64) for trigram, coins in postings.items()}
+
+    @staticmethod
+    def _build_order(values: np.ndarray, descending: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Coins in order, their sort values and each coin's position; missing values (inf) sort last"""
+        signed = np.where(np.isinf(values), np.inf, -values) if descending else values
+        # stable, so equal values stay in id order
+        order = np.argsort(signed, kind='stable')
+        positions = np.empty(len(order), dtype=np.int64)
+        positions[order] = np.arange(len(order))
+        return order, signed[order], positions
+
+    def _position_after(self, sort: str, descending: bool, key: SortKey) -> int:
+        """Position in the order of the first coin after the sort key `key`"""
+        order, sorted_values, _ = self._orders[(sort, descending)]
+        value, coin_id = key
+        lo = int(np.searchsorted(sorted_values, value, side='left'))
+        hi = int(np.searchsorted(sorted_values, value, side='right'))
+        return lo + int(np.searchsorted(self.ids[order[lo:hi]], coin_id, side='right'))
+
+    def matches(self, query: str) -> np.ndarray:
+        """Coins with a field starting with the query or, from 3 characters, containing it"""
+        query = query.strip().lower()
+        lo = bisect_left(self._prefix_keys, query)
+        hi = bisect_left(self._prefix_keys, query + '\uffff')
+        found = [self._prefix_coins[lo:hi]]
+        if len(query) >= 3:
+            candidates = None
+            for trigram in _trigrams(query):
+                posting = self._postings.get(trigram)
+                if posting is None:
+                    candidates = None
+                    break
+                candidates = posting if candidates is None else np.intersect1d(candidates, posting,
+                                                                              assume_unique=True)
+            if candidates is not None:
+                found.append(np.fromiter((i for i in candidates.tolist() if query in self._search_text[i]),
+                                         dtype=np.int64))
+        return np.unique(np.concatenate(found))
+
+    def page(self, query: Optional[str] = None, sort: str = 'market_cap', descending: bool = True,
+             limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One page of coins matching `query` (all coins if empty) in the given order.
+
+        Returns {'data', 'total', 'next_cursor'}; ValueError for an unknown
+        sort or a bad cursor.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unsupported sort: {sort}, expected one of {', '.join(SORT_FIELDS)}")
+        order, sorted_values, positions = self._orders[(sort, descending)]
+        start = self._position_after(sort, descending, decode_cursor(cursor, sort, descending)) if cursor else 0
+
+        if query and query.strip():
+            selected = np.sort(positions[self.matches(query)])
+            total = len(selected)
+            first = int(np.searchsorted(selected, start))
+            page_positions = selected[first:first + limit]
+            has_more = first + limit < total
+        else:
+            total = len(order)
+            page_positions = np.arange(start, min(start + limit, total))
+            has_more = start + limit < total
+
+        page_positions = page_positions.tolist()
+        next_cursor = None
+        if has_more and page_positions:
+            last = page_positions[-1]
+            next_cursor = encode_cursor(sort, descending, (float(sorted_values[last]), str(self.ids[order[last]])))
+        return {
+            'data': [self.entries[order[position]] for position in page_positions],
+            'total': total,
+            'next_cursor': next_cursor
+        }
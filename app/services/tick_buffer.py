@@ -0,0 +1,83 @@
+from typing import Dict, List, Optional
+import numpy as np
+from app.config.settings import TICK_BUFFER_SIZE
+from app.utils.data_utils import round_price
+
+
+class TickRingBuffer:
+    """Fixed-size ring of the most recent ticks of one symbol.
+
+    Ticks are appended with increasing sequence numbers and timestamps, so
+    once the ring is unrolled into order both can be searched with
+    np.searchsorted. The oldest tick is overwritten when the ring is full.
+    """
+
+    __slots__ = ('capacity', 'seqs', 'timestamps', 'prices', 'size', 'next_slot',
+                 'dropped_seq', 'dropped_timestamp')
+
+    def __init__(self, capacity: int = TICK_BUFFER_SIZE):
+        self.capacity = capacity
+        self.seqs = np.zeros(capacity, dtype=np.int64)
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+        self.next_slot = 0
+        # newest overwritten tick, replays starting before it are incomplete
+        self.dropped_seq: Optional[int] = None
+        self.dropped_timestamp: Optional[int] = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, seq: int, timestamp: int, price: float) -> None:
+        slot = self.next_slot
+        if self.size == self.capacity:
+            self.dropped_seq = int(self.seqs[slot])
+            self.dropped_timestamp = int(self.timestamps[slot])
+        self.seqs[slot] = seq
+        self.timestamps[slot] = timestamp
+        self.prices[slot] = price
+        self.next_slot = (slot + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def _ordered(self, column: np.ndarray) -> np.ndarray:
+        if self.size < self.capacity:
+            return column[:self.size]
+        return np.concatenate((column[self.next_slot:], column[:self.next_slot]))
+
+    def since(self, seq: Optional[int] = None, timestamp: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Ticks with a sequence number above `seq`, or else a timestamp above `timestamp`.
+
+        `complete` is False when ticks the caller asked for were already
+        overwritten.
+        """
+        seqs = self._ordered(self.seqs)
+        timestamps = self._ordered(self.timestamps)
+        if seq is not None:
+            lo = int(np.searchsorted(seqs, seq, side='right'))
+            complete = self.dropped_seq is None or seq >= self.dropped_seq
+        else:
+            lo = int(np.searchsorted(timestamps, timestamp, side='right'))
+            complete = self.dropped_timestamp is None or timestamp >= self.dropped_timestamp
+        return {
+            'seqs': seqs[lo:],
+            'timestamps': timestamps[lo:],
+            'prices': self._ordered(self.prices)[lo:],
+            'complete': bool(complete)
+        }
+
+
+def merge_replay(symbol_ticks: Dict[str, Dict[str, np.ndarray]]) -> List[Dict]:
+    """Replayed ticks of several symbols as price updates in sequence order"""
+    updates = []
+    for symbol, ticks in symbol_ticks.items():
+        updates.extend({
+            'symbol': symbol,
+            'price': round_price(price),
+            'timestamp': timestamp,
+            'seq': seq
+        } for seq, timestamp, price in zip(ticks['seqs'].tolist(), ticks['timestamps'].tolist(),
+                                            ticks['prices'].tolist()))
+    updates.sort(key=lambda update: update['seq'])
+    return updates
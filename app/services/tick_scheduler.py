@@ -0,0 +1,138 @@
+from typing import Callable, Dict, List, Optional
+import logging
+import threading
+import time
+from app.config.settings import TICK_SCHEDULER_MAX_SLEEP
+from app.services.metrics import TICK_DURATION_SECONDS, TICK_LAG_SECONDS, TICK_OVERRUNS, TICKS_SKIPPED
+
+logger = logging.getLogger(__name__)
+
+# called with the monotonic deadline the run was scheduled for
+JobCallback = Callable[[float], None]
+
+
+class ScheduledJob:
+    __slots__ = ('name', 'interval', 'callback', 'next_due', 'runs', 'skipped', 'overruns')
+
+    def __init__(self, name: str, interval: float, callback: JobCallback, first_due: float):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.next_due = first_due
+        self.runs = 0
+        self.skipped = 0
+        self.overruns = 0
+
+
+class TickScheduler:
+    """Runs periodic jobs from a single background task on absolute deadlines.
+
+    Each job fires at first_due + k * interval, so time spent in a job does
+    not push later runs back. A job that falls one or more whole intervals
+    behind skips the missed deadlines and runs once for the latest one
+    instead of queuing them, counting them as skipped. Runs longer than the
+    job's interval are counted as overruns.
+
+    The loop uses socketio.sleep and socketio.start_background_task when
+    started with a SocketIO instance, so it works under every async_mode.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, max_sleep: float = TICK_SCHEDULER_MAX_SLEEP):
+        self.clock = clock
+        # upper bound on one sleep, so newly added jobs and stop() are noticed promptly
+        self.max_sleep = max_sleep
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._generation = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def add_job(self, name: str, interval: float, callback: JobCallback,
+                first_due: Optional[float] = None) -> ScheduledJob:
+        """Register (or replace) a job; it first runs at first_due, by default right away"""
+        if interval <= 0:
+            raise ValueError(f"Job {name} needs a positive interval")
+        job = ScheduledJob(name, interval, callback, self.clock() if first_due is None else first_due)
+        with self._lock:
+            self._jobs[name] = job
+        return job
+
+    def remove_job(self, name: str) -> bool:
+        with self._lock:
+            return self._jobs.pop(name, None) is not None
+
+    def remove_jobs(self, prefix: str) -> None:
+        with self._lock:
+            for name in [name for name in self._jobs if name.startswith(prefix)]:
+                del self._jobs[name]
+
+    def has_job(self, name: str) -> bool:
+        return name in self._jobs
+
+    def jobs(self) -> List[ScheduledJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            return min((job.next_due for job in self._jobs.values()), default=None)
+
+    def run_pending(self) -> int:
+        """Run every job whose deadline has passed, earliest first; returns the number of runs"""
+        now = self.clock()
+        with self._lock:
+            due_jobs = sorted((job for job in self._jobs.values() if job.next_due <= now),
+                              key=lambda job: job.next_due)
+        for job in due_jobs:
+            now = self.clock()
+            missed = int((now - job.next_due) // job.interval)
+            due = job.next_due + missed * job.interval
+            job.next_due = due + job.interval
+            if missed:
+                job.skipped += missed
+                TICKS_SKIPPED.labels(job.name).inc(missed)
+            TICK_LAG_SECONDS.labels(job.name).observe(now - due)
+
+            started = self.clock()
+            try:
+                job.callback(due)
+            except Exception as e:
+                logger.error("Error in scheduled job %s: %s", job.name, e)
+            duration = self.clock() - started
+            job.runs += 1
+            TICK_DURATION_SECONDS.labels(job.name).observe(duration)
+            if duration > job.interval:
+                job.overruns += 1
+                TICK_OVERRUNS.labels(job.name).inc()
+        return len(due_jobs)
+
+    def start(self, socketio=None) -> bool:
+        """Start the loop unless it is already running"""
+        with self._lock:
+            if self._running:
+                return False
+            self._running = True
+            self._generation += 1
+            generation = self._generation
+        if socketio is not None:
+            socketio.start_background_task(self._run, socketio.sleep, generation)
+        else:
+            threading.Thread(target=self._run, args=(time.sleep, generation), name='tick-scheduler',
+                             daemon=True).start()
+        return True
+
+    def stop(self) -> None:
+        """Ask the loop to exit after its current sleep; never blocks on it"""
+        with self._lock:
+            self._running = False
+
+    def _run(self, sleep_fn: Callable[[float], None], generation: int) -> None:
+        # a loop left over from before a stop()/start() exits instead of running twice
+        while self._running and generation == self._generation:
+            self.run_pending()
+            next_due = self.next_due()
+            delay = self.max_sleep if next_due is None else next_due - self.clock()
+            sleep_fn(min(max(delay, 0.0), self.max_sleep))
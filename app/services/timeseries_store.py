@@ -0,0 +1,174 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from app.utils.data_utils import pair_values
+
+
+class CoinSeries:
+    """Columnar price history for a single coin"""
+
+    __slots__ = ('timestamps', 'prices', 'volumes', 'market_caps', '_buffers')
+
+    def __init__(self, timestamps: np.ndarray, prices: np.ndarray,
+                 volumes: np.ndarray, market_caps: np.ndarray):
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volumes = volumes
+        self.market_caps = market_caps
+        # spare capacity for appends, the public columns are views into it
+        self._buffers = None
+
+    @classmethod
+    def empty(cls) -> 'CoinSeries':
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64),
+                   np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64))
+
+    @classmethod
+    def from_market_chart(cls, market_data: Dict) -> 'CoinSeries':
+        """Build a series from CoinGecko market_chart lists of [ms_timestamp, value] pairs.
+
+        Volumes and market caps are aligned to prices by position, missing
+        entries are filled with 0.
+        """
+        prices = market_data.get('prices') or []
+        if not prices:
+            return cls.empty()
+
+        price_pairs = np.asarray(prices, dtype=np.float64).reshape(-1, 2)
+        timestamps = price_pairs[:, 0].astype(np.int64)
+        values = np.ascontiguousarray(price_pairs[:, 1])
+        volumes = pair_values(market_data.get('total_volumes') or [], len(values))
+        market_caps = pair_values(market_data.get('market_caps') or [], len(values))
+
+        if len(timestamps) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, values = timestamps[order], values[order]
+            volumes, market_caps = volumes[order], market_caps[order]
+
+        return cls(np.ascontiguousarray(timestamps), values, volumes, market_caps)
+
+    @classmethod
+    def concatenate(cls, parts: List['CoinSeries']) -> 'CoinSeries':
+        """Join consecutive, non-overlapping series into one"""
+        parts = [part for part in parts if len(part)]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(part, name) for part in parts])
+                     for name in ('timestamps', 'prices', 'volumes', 'market_caps')))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, timestamp_ms: int, price: float, volume: float = 0.0, market_cap: float = 0.0) -> bool:
+        """Append a point newer than the last one, growing the buffers geometrically.
+
+        Existing views of the columns stay valid, so readers never see a
+        partially written point.
+        """
+        size = len(self)
+        if size and timestamp_ms <= self.timestamps[-1]:
+            return False
+        self._reserve(1)
+        for buffer, value in zip(self._buffers, (timestamp_ms, price, volume, market_cap)):
+            buffer[size] = value
+        self._publish(size + 1)
+        return True
+
+    def extend(self, other: 'CoinSeries') -> int:
+        """Append the points of `other` newer than the last point, returning how many were added"""
+        start = other.index_range(self.last_timestamp + 1 if len(self) else None)[0]
+        added = len(other) - start
+        if added <= 0:
+            return 0
+        size = len(self)
+        self._reserve(added)
+        extra = (other.timestamps, other.prices, other.volumes, other.market_caps)
+        for buffer, values in zip(self._buffers, extra):
+            buffer[size:size + added] = values[start:]
+        self._publish(size + added)
+        return added
+
+    def _reserve(self, extra: int) -> None:
+        size = len(self)
+        if self._buffers is not None and size + extra <= len(self._buffers[0]):
+            return
+        columns = (self.timestamps, self.prices, self.volumes, self.market_caps)
+        capacity = max(16, (size + extra) * 2)
+        buffers = tuple(np.empty(capacity, dtype=column.dtype) for column in columns)
+        for buffer, column in zip(buffers, columns):
+            buffer[:size] = column
+        self._buffers = buffers
+
+    def _publish(self, size: int) -> None:
+        self.timestamps, self.prices, self.volumes, self.market_caps = (
+            buffer[:size] for buffer in self._buffers
+        )
+
+    def index_range(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Tuple[int, int]:
+        """Binary search the [lo, hi) positions of points with start_ms <= timestamp <= end_ms"""
+        lo = int(np.searchsorted(self.timestamps, start_ms, side='left')) if start_ms is not None else 0
+        hi = int(np.searchsorted(self.timestamps, end_ms, side='right')) if end_ms is not None else len(self)
+        return lo, max(lo, hi)
+
+    def slice(self, lo: int, hi: int) -> 'CoinSeries':
+        """Zero-copy view of the points in [lo, hi)"""
+        return CoinSeries(self.timestamps[lo:hi], self.prices[lo:hi],
+                          self.volumes[lo:hi], self.market_caps[lo:hi])
+
+    def window(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> 'CoinSeries':
+        return self.slice(*self.index_range(start_ms, end_ms))
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        return int(self.timestamps[0]) if len(self.timestamps) else None
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.timestamps[-1]) if len(self.timestamps) else None
+
+    @property
+    def nbytes(self) -> int:
+        return (self.timestamps.nbytes + self.prices.nbytes +
+                self.volumes.nbytes + self.market_caps.nbytes)
+
+
+class TimeSeriesStore:
+    """Per-coin columnar store for historical market data"""
+
+    def __init__(self, series: Optional[Dict[str, CoinSeries]] = None):
+        self._series = dict(series or {})
+
+    @classmethod
+    def from_historical(cls, historical: Dict[str, Dict]) -> 'TimeSeriesStore':
+        """Build the store from the `historical` section of the dataset"""
+        return cls({
+            coin_id: CoinSeries.from_market_chart(market_data or {})
+            for coin_id, market_data in historical.items()
+        })
+
+    def get(self, coin_id: str) -> Optional[CoinSeries]:
+        return self._series.get(coin_id)
+
+    def get_or_create(self, coin_id: str) -> CoinSeries:
+        series = self._series.get(coin_id)
+        if series is None:
+            series = self._series[coin_id] = CoinSeries.empty()
+        return series
+
+    def coin_ids(self) -> List[str]:
+        return list(self._series.keys())
+
+    def __contains__(self, coin_id: str) -> bool:
+        return coin_id in self._series
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._series)
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(series.nbytes for series in self._series.values())
+
@@ -1,8 +1,15 @@
-from .date_utils import validate_date_range
+from .date_utils import validate_date_range, date_range_to_timestamps
 from .data_utils import format_kline_data, get_coin_extra_info
+from .candle_utils import normalize_interval, resample_ohlcv
+from .indicator_utils import parse_indicators, compute_indicators
 
 __all__ = [
     'validate_date_range',
+    'date_range_to_timestamps',
     'format_kline_data',
-    'get_coin_extra_info'
+    'get_coin_extra_info',
+    'normalize_interval',
+    'resample_ohlcv',
+    'parse_indicators',
+    'compute_indicators'
 ] 
\ No newline at end of file
@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+import numpy as np
+
+INTERVAL_SECONDS = {
+    '1m': 60,
+    '5m': 5 * 60,
+    '15m': 15 * 60,
+    '1h': 60 * 60,
+    '4h': 4 * 60 * 60,
+    '1d': 24 * 60 * 60,
+    '1w': 7 * 24 * 60 * 60
+}
+
+INTERVAL_ALIASES = {
+    'minute': '1m',
+    'hourly': '1h',
+    'daily': '1d',
+    'weekly': '1w'
+}
+
+# 1970-01-01 was a Thursday, weekly candles start on Monday
+WEEK_OFFSET_MS = 4 * 24 * 60 * 60 * 1000
+
+CANDLE_FIELDS = ('timestamps', 'open', 'high', 'low', 'close', 'volume', 'market_cap')
+
+def normalize_interval(interval: str) -> Optional[str]:
+    """Map an interval name or alias to its canonical key, None if unsupported"""
+    interval = (interval or '').strip().lower()
+    interval = INTERVAL_ALIASES.get(interval, interval)
+    return interval if interval in INTERVAL_SECONDS else None
+
+def bucket_start(timestamps_ms, interval: str):
+    """Start (ms) of the candle each timestamp falls into"""
+    width = INTERVAL_SECONDS[interval] * 1000
+    offset = WEEK_OFFSET_MS if interval == '1w' else 0
+    return (timestamps_ms - offset) // width * width + offset
+
+def resample_ohlcv(timestamps_ms: np.ndarray, prices: np.ndarray, volumes: np.ndarray,
+                   market_caps: np.ndarray, interval: str) -> Dict[str, np.ndarray]:
+    """Aggregate a sorted price series into OHLCV candles.
+
+    Volume is summed over the bucket, market cap is the last value seen.
+    """
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)
+    if not len(timestamps_ms):
+        empty = np.empty(0, dtype=np.float64)
+        return {
+            'timestamps': np.empty(0, dtype=np.int64),
+            'open': empty, 'high': empty, 'low': empty, 'close': empty,
+            'volume': empty, 'market_cap': empty
+        }
+
+    buckets = bucket_start(timestamps_ms, interval)
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(buckets))
+
+    return {
+        'timestamps': buckets[starts],
+        'open': prices[starts],
+        'high': np.maximum.reduceat(prices, starts),
+        'low': np.minimum.reduceat(prices, starts),
+        'close': prices[ends - 1],
+        'volume': np.add.reduceat(volumes, starts),
+        'market_cap': market_caps[ends - 1]
+    }
@@ -1,44 +1,101 @@
-from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, Optional
+import json
+import struct
+import numpy as np
 from app.config.settings import VS_CURRENCY
 
+KLINE_FIELDS = ('time', 'trading_date', 'price', 'volume', 'market_cap', 'change', 'change_percent')
+
+def round_price(price: float) -> float:
+    """Price rounded for clients: cents from 1 up, 6 significant digits for coins trading below 1"""
+    if abs(price) >= 1 or price == 0:
+        return round(price, 2)
+    return float(f"{price:.6g}")
+
+def pair_values(pairs: List, length: int) -> np.ndarray:
+    """Value column of [timestamp, value] pairs aligned by position, padded with 0"""
+    values = np.zeros(length, dtype=np.float64)
+    if len(pairs):
+        column = np.asarray(pairs, dtype=np.float64).reshape(-1, 2)[:length, 1]
+        values[:len(column)] = column
+    return values
+
+def compute_kline_columns(timestamps_ms: np.ndarray, prices: np.ndarray, volumes: np.ndarray,
+                          market_caps: np.ndarray, prev_price: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Compute every kline column for a window in a single vectorized pass.
+
+    `prev_price` is the price just before the window; without it the first
+    point is compared against itself.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    times = np.asarray(timestamps_ms, dtype=np.int64) // 1000
+
+    previous = np.empty_like(prices)
+    if len(prices):
+        previous[0] = prices[0] if prev_price is None else prev_price
+        previous[1:] = prices[:-1]
+    change = prices - previous
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_percent = np.where(previous > 0, change / previous * 100, 0.0)
+
+    return {
+        'time': times,
+        'trading_date': np.datetime_as_string(times.astype('datetime64[s]'), unit='D'),
+        'price': prices,
+        'volume': np.asarray(volumes, dtype=np.float64),
+        'market_cap': np.asarray(market_caps, dtype=np.float64),
+        'change': change,
+        'change_percent': change_percent
+    }
+
+def _row_fields(columns: Dict[str, np.ndarray]) -> List[str]:
+    fields = [field for field in KLINE_FIELDS if field in columns]
+    return fields + [field for field in columns if field not in KLINE_FIELDS]
+
+def _column_values(column: np.ndarray) -> List:
+    """Column as Python values, with NaN (indicator warm-up) as None so it serializes as null"""
+    if column.dtype.kind == 'f':
+        missing = np.isnan(column)
+        if missing.any():
+            return np.where(missing, None, column).tolist()
+    return column.tolist()
+
+def kline_rows(columns: Dict[str, np.ndarray], coin_info: Optional[Dict] = None) -> List[Dict]:
+    """Turn kline columns into row dicts, merging coin info into the last row"""
+    fields = _row_fields(columns)
+    rows = [dict(zip(fields, values)) for values in zip(*(_column_values(columns[field]) for field in fields))]
+    if rows and coin_info is not None:
+        rows[-1].update(get_coin_extra_info(coin_info))
+    return rows
+
+def iter_kline_rows(columns: Dict[str, np.ndarray], coin_info: Optional[Dict] = None,
+                    chunk_size: int = 1000) -> Iterator[List[Dict]]:
+    """Yield row dicts in chunks so only one chunk is materialized at a time"""
+    fields = _row_fields(columns)
+    total = len(columns['time'])
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        chunk = [dict(zip(fields, values))
+                 for values in zip(*(_column_values(columns[field][start:stop]) for field in fields))]
+        if stop == total and coin_info is not None:
+            chunk[-1].update(get_coin_extra_info(coin_info))
+        yield chunk
+
 def format_kline_data(prices: List, volumes: List, market_caps: List, coin_info: Dict) -> List[Dict]:
-    formatted_data = []
-    prices_len = len(prices)
-    volumes_len = len(volumes)
-    market_caps_len = len(market_caps)
-
-    for i in range(prices_len):
-        timestamp = int(prices[i][0] / 1000)
-        price = prices[i][1]
-        volume = volumes[i][1] if i < volumes_len else 0
-        market_cap = market_caps[i][1] if i < market_caps_len else 0
-
-        prev_price = prices[i-1][1] if i > 0 else price
-        change = price - prev_price
-        change_percent = (change / prev_price * 100) if prev_price > 0 else 0
-
-        kline_data = {
-            'time': timestamp,
-            'trading_date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d'),
-            'price': float(price),
-            'volume': float(volume),
-            'market_cap': float(market_cap),
-            'change': float(change),
-            'change_percent': float(change_percent)
-        }
-
-        if i == prices_len - 1:
-            kline_data.update(get_coin_extra_info(coin_info))
-
-        formatted_data.append(kline_data)
-
-    return formatted_data
+    price_pairs = np.asarray(prices, dtype=np.float64).reshape(-1, 2)
+    columns = compute_kline_columns(
+        price_pairs[:, 0].astype(np.int64),
+        price_pairs[:, 1],
+        pair_values(volumes, len(price_pairs)),
+        pair_values(market_caps, len(price_pairs))
+    )
+    return kline_rows(columns, coin_info)
 
 def get_coin_extra_info(coin_info: Dict) -> Dict[str, Any]:
     return {
-        'name': coin_info.get('name', ''),
-        'symbol': coin_info.get('symbol', '').upper(),
+        # CoinGecko sends null names and symbols for some coins
+        'name': coin_info.get('name') or '',
+        'symbol': (coin_info.get('symbol') or '').upper(),
         'market_cap_rank': coin_info.get('market_cap_rank', 0),
         'total_supply': float(coin_info.get('market_data', {}).get('total_supply', 0) or 0),
         'max_supply': float(coin_info.get('market_data', {}).get('max_supply', 0) or 0),
@@ -47,4 +104,39 @@ def get_coin_extra_info(coin_info: Dict) -> Dict[str, Any]:
         'atl': float(coin_info.get('market_data', {}).get('atl', {}).get(VS_CURRENCY, 0) or 0),
         'ath_change_percentage': float(coin_info.get('market_data', {}).get('ath_change_percentage', {}).get(VS_CURRENCY, 0) or 0),
         'atl_change_percentage': float(coin_info.get('market_data', {}).get('atl_change_percentage', {}).get(VS_CURRENCY, 0) or 0)
-    } 
\ No newline at end of file
+    }
+
+BINARY_KLINES_MAGIC = b'BTKL'
+BINARY_KLINES_VERSION = 1
+
+def kline_columnar(columns: Dict[str, np.ndarray], coin_info: Optional[Dict], info: Dict) -> Dict[str, Any]:
+    """One list per field with the coin metadata hoisted next to the request info"""
+    return {
+        'columns': {field: _column_values(columns[field]) for field in _row_fields(columns)},
+        'meta': get_coin_extra_info(coin_info) if coin_info is not None else {},
+        'info': info
+    }
+
+def encode_kline_binary(columns: Dict[str, np.ndarray], coin_info: Optional[Dict], info: Dict) -> bytes:
+    """Pack kline columns as little-endian typed arrays behind a small JSON header.
+
+    Layout: b'BTKL', uint8 version, 3 padding bytes, uint32 header length,
+    UTF-8 JSON header ({'length', 'fields': [{'name', 'dtype', 'offset'}],
+    'meta', 'info'}), then each column padded to an 8 byte boundary with
+    offsets relative to the end of the header. trading_date is left out,
+    it is derivable from time.
+    """
+    fields = [field for field in _row_fields(columns) if columns[field].dtype.kind in 'iuf']
+    buffers = [np.ascontiguousarray(columns[field], dtype='<i8' if columns[field].dtype.kind in 'iu' else '<f8')
+               for field in fields]
+    offsets = np.cumsum([0] + [buffer.nbytes for buffer in buffers[:-1]]).tolist()
+    header = json.dumps({
+        'length': len(columns['time']),
+        'fields': [{'name': field, 'dtype': buffer.dtype.str, 'offset': offset}
+                   for field, buffer, offset in zip(fields, buffers, offsets)],
+        'meta': get_coin_extra_info(coin_info) if coin_info is not None else {},
+        'info': info
+    }).encode('utf-8')
+    header += b' ' * (-(12 + len(header)) % 8)
+    prefix = BINARY_KLINES_MAGIC + struct.pack('<B3xI', BINARY_KLINES_VERSION, len(header))
+    return b''.join([prefix, header] + [buffer.tobytes() for buffer in buffers])
@@ -1,8 +1,11 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Tuple
-from app.config.settings import MAX_HISTORICAL_DAYS, DEFAULT_START_DATE
+import logging
+from app.config.settings import MAX_HISTORICAL_DAYS, DEFAULT_START_DATE, DEFAULT_END_DATE
 
-def validate_date_range(start_date: str, end_date: str) -> Tuple[str, str, str]:
+logger = logging.getLogger(__name__)
+
+def validate_date_range(start_date: str, end_date: str, max_days: int = MAX_HISTORICAL_DAYS) -> Tuple[str, str, str]:
     try:
         start_dt = datetime.strptime(start_date, '%Y-%m-%d')
         end_dt = datetime.strptime(end_date, '%Y-%m-%d')
@@ -14,15 +17,21 @@ def validate_date_range(start_date: str, end_date: str) -> Tuple[str, str, str]:
 
         date_range = (end_dt - start_dt).days
 
-        if date_range > MAX_HISTORICAL_DAYS:
-            start_dt = end_dt - timedelta(days=MAX_HISTORICAL_DAYS-1)
+        if date_range > max_days:
+            start_dt = end_dt - timedelta(days=max_days-1)
             start_date = start_dt.strftime('%Y-%m-%d')
-            message = f"Date range exceeded maximum allowed ({MAX_HISTORICAL_DAYS} days). Adjusted to last {MAX_HISTORICAL_DAYS} days."
+            message = f"Date range exceeded maximum allowed ({max_days} days). Adjusted to last {max_days} days."
         else:
             message = ""
 
         return start_date, end_date, message
 
     except ValueError as e:
-        print(f"Error validating dates: {e}")
-        return DEFAULT_START_DATE, end_date, "Invalid date format. Using default date range." 
\ No newline at end of file
+        logger.warning("Error validating dates: %s", e)
+        return DEFAULT_START_DATE, DEFAULT_END_DATE, "Invalid date format. Using default date range."
+
+def date_range_to_timestamps(start_date: str, end_date: str) -> Tuple[int, int]:
+    """Convert an inclusive YYYY-MM-DD range to UTC millisecond bounds"""
+    start_dt = datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    end_dt = datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=timezone.utc) + timedelta(days=1)
+    return int(start_dt.timestamp() * 1000), int(end_dt.timestamp() * 1000) - 1 
\ No newline at end of file
@@ -0,0 +1,108 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.utils.candle_utils import bucket_start
+
+# name -> default parameters, in the order they are given in a spec ("macd:12:26:9")
+INDICATOR_DEFAULTS = {
+    'sma': (20,),
+    'ema': (20,),
+    'rsi': (14,),
+    'macd': (12, 26, 9),
+    'bb': (20, 2),
+    'vwap': ()
+}
+
+MAX_INDICATOR_PERIOD = 1000
+
+IndicatorSpec = Tuple[str, Tuple]
+
+def parse_indicators(spec: Optional[str], max_count: int = 10) -> List[IndicatorSpec]:
+    """Parse "sma:20,ema:50,rsi,macd:12:26:9,bb:20:2,vwap" into (name, params) pairs.
+
+    Missing parameters take their defaults; `vwap` without a period is
+    anchored to the UTC day, `vwap:n` is a rolling window of n candles.
+    Raises ValueError on unknown names or bad parameters.
+    """
+    specs = []
+    for item in (spec or '').split(','):
+        item = item.strip().lower()
+        if not item:
+            continue
+        name, *raw_params = item.split(':')
+        if name not in INDICATOR_DEFAULTS:
+            raise ValueError(f"Unsupported indicator: {name}")
+        defaults = INDICATOR_DEFAULTS[name]
+        limit = 1 if name == 'vwap' else len(defaults)
+        if len(raw_params) > limit:
+            raise ValueError(f"Too many parameters for {name}")
+        try:
+            given = [float(p) if name == 'bb' and i == 1 else int(p) for i, p in enumerate(raw_params)]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for {name}: {item}")
+        params = tuple(given) + defaults[len(given):]
+        if name == 'bb':
+            params = (params[0], float(params[1]))
+        if any(p <= 0 or p > MAX_INDICATOR_PERIOD for p in params):
+            raise ValueError(f"Indicator parameters must be between 1 and {MAX_INDICATOR_PERIOD}: {item}")
+        if name == 'macd' and params[0] >= params[1]:
+            raise ValueError(f"MACD fast period must be shorter than the slow period: {item}")
+        if (name, params) not in specs:
+            specs.append((name, params))
+    if len(specs) > max_count:
+        raise ValueError(f"At most {max_count} indicators per request")
+    return specs
+
+def _suffix(params: Tuple) -> str:
+    return ''.join(f"_{p:g}" for p in params)
+
+def _ema(values: pd.Series, span: int) -> pd.Series:
+    return values.ewm(span=span, adjust=False, min_periods=span).mean()
+
+def compute_indicators(candles: Dict[str, np.ndarray], specs: List[IndicatorSpec]) -> Dict[str, np.ndarray]:
+    """Indicator columns over OHLCV candles, named like `sma_20` or `macd_signal_12_26_9`.
+
+    Values are NaN until an indicator has seen enough candles.
+    """
+    close = pd.Series(candles['close'], dtype=np.float64)
+    columns = {}
+    for name, params in specs:
+        suffix = _suffix(params)
+        if name == 'sma':
+            columns[f"sma{suffix}"] = close.rolling(params[0]).mean()
+        elif name == 'ema':
+            columns[f"ema{suffix}"] = _ema(close, params[0])
+        elif name == 'rsi':
+            # Wilder's smoothing
+            delta = close.diff()
+            alpha = 1.0 / params[0]
+            gain = delta.clip(lower=0).ewm(alpha=alpha, adjust=False, min_periods=params[0]).mean()
+            loss = (-delta).clip(lower=0).ewm(alpha=alpha, adjust=False, min_periods=params[0]).mean()
+            rsi = 100 - 100 / (1 + gain / loss)
+            columns[f"rsi{suffix}"] = rsi.where(loss != 0, 100.0).where(gain.notna())
+        elif name == 'macd':
+            fast, slow, signal = params
+            macd = _ema(close, fast) - _ema(close, slow)
+            signal_line = macd.ewm(span=signal, adjust=False, min_periods=signal).mean()
+            columns[f"macd{suffix}"] = macd
+            columns[f"macd_signal{suffix}"] = signal_line
+            columns[f"macd_hist{suffix}"] = macd - signal_line
+        elif name == 'bb':
+            period, width = params
+            middle = close.rolling(period).mean()
+            deviation = close.rolling(period).std(ddof=0)
+            columns[f"bb_upper{suffix}"] = middle + width * deviation
+            columns[f"bb_middle{suffix}"] = middle
+            columns[f"bb_lower{suffix}"] = middle - width * deviation
+        elif name == 'vwap':
+            typical = (pd.Series(candles['high']) + pd.Series(candles['low']) + close) / 3
+            volume = pd.Series(candles['volume'], dtype=np.float64)
+            if params:
+                weighted = (typical * volume).rolling(params[0]).sum()
+                total = volume.rolling(params[0]).sum()
+            else:
+                session = bucket_start(np.asarray(candles['timestamps'], dtype=np.int64), '1d')
+                weighted = (typical * volume).groupby(session).cumsum()
+                total = volume.groupby(session).cumsum()
+            columns[f"vwap{suffix}"] = (weighted / total).where(total > 0)
+    return {name: column.to_numpy(dtype=np.float64) for name, column in columns.items()}
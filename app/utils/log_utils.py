@@ -0,0 +1,47 @@
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+import atexit
+import logging
+import queue
+import sys
+from app.config.settings import LOG_LEVEL, LOG_QUEUE_SIZE
+from app.services.metrics import LOG_RECORDS_DROPPED
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: records are dropped when the queue is full"""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def configure_logging(level: str = LOG_LEVEL, queue_size: int = LOG_QUEUE_SIZE) -> QueueListener:
+    """Send records of the `app` loggers through a bounded queue to a stream handler on its own thread.
+
+    Request handlers and tick loops only format and enqueue a record; the
+    write to stdout happens on the listener thread. Calling it again only
+    updates the level.
+    """
+    global _listener
+    logger = logging.getLogger('app')
+    logger.setLevel(level.upper())
+    if _listener is not None:
+        return _listener
+
+    records = queue.Queue(queue_size)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(DroppingQueueHandler(records))
+    logger.propagate = False
+    _listener = QueueListener(records, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # flush what is still queued at interpreter exit
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,14 @@
+"""Offline benchmarks for the REST and Socket.IO paths.
+
+    python -m benchmarks                    # everything, default sizes
+    python -m benchmarks.micro --sizes 1k,100k,10m
+    python -m benchmarks.http_load --concurrency 32 --requests 5000
+    python -m benchmarks.socketio_load --clients 2000 --duration 20
+    python -m benchmarks.compare old.json new.json
+
+Each writes a JSON document to benchmarks/results/ (or --output).
+"""
+import os
+
+# benchmarks never touch the local history database
+os.environ.setdefault('HISTORY_DB_PATH', '')
@@ -0,0 +1,24 @@
+"""Run the micro, HTTP and Socket.IO benchmarks and write one combined results file"""
+import argparse
+from benchmarks import http_load, micro, socketio_load
+from benchmarks.common import write_results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--quick', action='store_true', help='small sizes for a fast smoke run')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/suite-<time>.json)')
+    args = parser.parse_args()
+
+    if args.quick:
+        runs = [(micro, ['--sizes', '1k,100k']),
+                (http_load, ['--points', '20000', '--requests', '300', '--concurrency', '8']),
+                (socketio_load, ['--clients', '200', '--duration', '5'])]
+    else:
+        runs = [(micro, ['--sizes', '1k,10k,100k,1m']), (http_load, []), (socketio_load, [])]
+
+    results = {}
+    for module, argv in runs:
+        name = module.__name__.rsplit('.', 1)[-1]
+        results[name] = module.main(argv)
+    path = write_results('suite', results, args.output)
+    print(f"suite: results written to {path}")
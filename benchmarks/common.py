@@ -0,0 +1,182 @@
+from typing import Dict, List, Optional, Sequence
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from app.services.snapshot_file import compile_snapshot, file_version
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# synthetic histories start here and tick every STEP_MS
+START_MS = 1672531200000  # 2023-01-01
+STEP_MS = 60 * 1000
+
+
+def summarize(latencies_s: Sequence[float], elapsed_s: Optional[float] = None) -> Dict:
+    """p50/p99/mean/max latency in ms plus throughput (operations per second)"""
+    values = np.asarray(latencies_s, dtype=np.float64) * 1000
+    if not len(values):
+        return {'count': 0}
+    summary = {
+        'count': int(len(values)),
+        'p50_ms': round(float(np.percentile(values, 50)), 4),
+        'p99_ms': round(float(np.percentile(values, 99)), 4),
+        'mean_ms': round(float(values.mean()), 4),
+        'max_ms': round(float(values.max()), 4)
+    }
+    if elapsed_s:
+        summary['throughput_per_s'] = round(len(values) / elapsed_s, 2)
+    return summary
+
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Current resident set size of a process (this one by default) in MB"""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid is None:
+        # peak instead of current where /proc is not available
+        scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+    return None
+
+
+def synthetic_series(points: int, seed: int = 0, start_ms: int = START_MS, step_ms: int = STEP_MS):
+    """Random-walk price history as (timestamps, prices, volumes, market_caps) arrays"""
+    rng = np.random.default_rng(seed)
+    timestamps = start_ms + np.arange(points, dtype=np.int64) * step_ms
+    prices = 30000 * np.exp(np.cumsum(rng.normal(0, 0.001, points)))
+    volumes = rng.uniform(1e6, 5e6, points)
+    market_caps = prices * 19.5e6
+    return timestamps, prices, volumes, market_caps
+
+
+def write_synthetic_dataset(path: str, coin_ids: Sequence[str], points: int, seed: int = 0) -> None:
+    """Write a sample.json-shaped dataset with `points` history entries per coin"""
+    with open(os.path.join(ROOT, 'app', 'data', 'sample.json')) as f:
+        data = json.load(f)
+    data['historical'] = {}
+    for index, coin_id in enumerate(coin_ids):
+        timestamps, prices, volumes, market_caps = synthetic_series(points, seed + index)
+        ts = timestamps.tolist()
+        data['historical'][coin_id] = {
+            'prices': [list(pair) for pair in zip(ts, prices.tolist())],
+            'total_volumes': [list(pair) for pair in zip(ts, volumes.tolist())],
+            'market_caps': [list(pair) for pair in zip(ts, market_caps.tolist())]
+        }
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class BenchmarkServer:
+    """create_app() served by benchmarks/server.py in a child process"""
+
+    def __init__(self, data_file: Optional[str] = None, env: Optional[Dict[str, str]] = None):
+        self.port = free_port()
+        self.env = dict(os.environ, PYTHONPATH=ROOT, HISTORY_DB_PATH='', INGESTION_ENABLED='0', **(env or {}))
+        # the same simulated price paths on every run
+        self.env.setdefault('PRICE_FEED_SEED', '0')
+        if data_file:
+            self.env['DATA_FILE'] = data_file
+            self.env['DATA_SNAPSHOT_FILE'] = os.path.splitext(data_file)[0] + '.snap'
+            compile_snapshot(data_file, self.env['DATA_SNAPSHOT_FILE'], file_version(data_file))
+        self.process = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 120) -> 'BenchmarkServer':
+        self.process = subprocess.Popen([sys.executable, '-m', 'benchmarks.server', str(self.port)],
+                                        cwd=ROOT, env=self.env, stdout=subprocess.PIPE, text=True)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            line = self.process.stdout.readline()
+            if line.startswith('READY'):
+                # keep draining the server's prints so it never blocks on a full pipe
+                threading.Thread(target=self.process.stdout.read, daemon=True).start()
+                return self
+            if not line and self.process.poll() is not None:
+                break
+        self.stop()
+        raise RuntimeError('Benchmark server did not start')
+
+    def rss_mb(self) -> Optional[float]:
+        return rss_mb(self.process.pid) if self.process else None
+
+    def stop(self) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+    def __enter__(self) -> 'BenchmarkServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(name: str, results: Dict, output: Optional[str] = None) -> str:
+    """Write results as JSON (to benchmarks/results/<name>-<time>.json by default)"""
+    document = {
+        'benchmark': name,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': git_revision(),
+        'environment': environment(),
+        'results': results
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+    return output
+
+
+def parse_sizes(value: str) -> List[int]:
+    """'1k,10k,1m' -> [1000, 10000, 1000000]"""
+    scale = {'k': 1000, 'm': 1000000}
+    sizes = []
+    for item in value.split(','):
+        item = item.strip().lower()
+        if item:
+            sizes.append(int(float(item[:-1]) * scale[item[-1]]) if item[-1] in scale else int(item))
+    return sizes
@@ -0,0 +1,48 @@
+"""Compare two benchmark result files: python -m benchmarks.compare old.json new.json"""
+from typing import Dict, Iterator, Tuple
+import argparse
+import json
+import sys
+
+# metrics where a lower value is better; every other compared metric is better when higher
+LOWER_IS_BETTER = ('p50_ms', 'p99_ms', 'mean_ms', 'rss_mb', 'server_rss_mb')
+HIGHER_IS_BETTER = ('throughput_per_s', 'messages_per_s', 'points_per_s')
+
+
+def metrics(node, path: str = '') -> Iterator[Tuple[str, float]]:
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from metrics(value, f"{path}.{key}" if path else key)
+    elif isinstance(node, (int, float)) and path.rsplit('.', 1)[-1].endswith(LOWER_IS_BETTER + HIGHER_IS_BETTER):
+        yield path, float(node)
+
+
+def compare(old: Dict, new: Dict, threshold: float) -> int:
+    """Print every shared metric with its change, returning the number of regressions beyond threshold %"""
+    before = dict(metrics(old.get('results', {})))
+    regressions = 0
+    for path, value in metrics(new.get('results', {})):
+        if path not in before:
+            continue
+        previous = before[path]
+        change = (value - previous) / previous * 100 if previous else 0.0
+        worse = change > threshold if path.endswith(LOWER_IS_BETTER) else change < -threshold
+        regressions += worse
+        print(f"{'!' if worse else ' '} {path:<60} {previous:>14.4f} {value:>14.4f} {change:>+8.1f}%")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='percent change counted as a regression (marked with !)')
+    args = parser.parse_args()
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    regressions = compare(old, new, args.threshold)
+    print(f"{regressions} regression(s) beyond {args.threshold}%")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,120 @@
+"""Concurrent HTTP load against /api/klines and /api/symbols on a local create_app() server"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+import argparse
+import http.client
+import itertools
+import os
+import tempfile
+import threading
+import time
+from benchmarks.common import START_MS, STEP_MS, BenchmarkServer, summarize, write_results, write_synthetic_dataset
+from app.config.settings import DEFAULT_SYMBOLS
+
+
+def day(offset_days: int) -> str:
+    start = datetime.fromtimestamp(START_MS / 1000, tz=timezone.utc)
+    return (start + timedelta(days=offset_days)).strftime('%Y-%m-%d')
+
+
+def scenarios(history_days: int) -> Dict[str, Callable[[int], str]]:
+    """Scenario name -> function of the request index returning the path"""
+    last = max(1, history_days - 1)
+    symbols = ','.join(DEFAULT_SYMBOLS)
+    return {
+        'symbols': lambda i: '/api/symbols',
+        # same window every time, served from the response cache after the first request
+        'klines_1d_cached': lambda i: f"/api/klines?symbol=bitcoin&interval=1d&start_date={day(0)}&end_date={day(last)}",
+        # rotating symbols and windows, most of them assembled from the store on first use
+        'klines_1h_windows': lambda i: (f"/api/klines?symbol={DEFAULT_SYMBOLS[i % len(DEFAULT_SYMBOLS)]}&interval=1h"
+                                        f"&start_date={day(i // len(DEFAULT_SYMBOLS) % last)}&end_date={day(last)}"),
+        'klines_columnar_1h': lambda i: (f"/api/klines?symbol=bitcoin&interval=1h&format=columnar"
+                                         f"&start_date={day(i % last)}&end_date={day(last)}"),
+        'klines_batch_1d': lambda i: (f"/api/klines/batch?symbols={symbols}&interval=1d"
+                                      f"&start_date={day(i % last)}&end_date={day(last)}")
+    }
+
+
+def run_scenario(port: int, path_for: Callable[[int], str], requests: int, concurrency: int) -> Dict:
+    counter = itertools.count()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    received = [0]
+    lock = threading.Lock()
+
+    def worker():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local_latencies, local_statuses, local_bytes = [], {}, 0
+        while True:
+            index = next(counter)
+            if index >= requests:
+                break
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path_for(index))
+                response = connection.getresponse()
+                body = response.read()
+                status = response.status
+                local_bytes += len(body)
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status = 0
+            local_latencies.append(time.perf_counter() - started)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            received[0] += local_bytes
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies, elapsed)
+    summary['statuses'] = {str(status): count for status, count in sorted(statuses.items())}
+    summary['bytes_per_s'] = round(received[0] / elapsed, 1)
+    return summary
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--points', type=int, default=100000,
+                        help='synthetic history points per coin (1 per minute); 0 serves app/data/sample.json')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--scenarios', help='comma separated subset of: ' + ', '.join(scenarios(2)))
+    parser.add_argument('--output', help='results file (default: benchmarks/results/http_load-<time>.json)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = None
+        history_days = 14
+        if args.points:
+            data_file = os.path.join(tmp, 'bench.json')
+            write_synthetic_dataset(data_file, DEFAULT_SYMBOLS, args.points)
+            history_days = max(1, args.points * STEP_MS // (24 * 60 * 60 * 1000))
+
+        selected = scenarios(history_days)
+        if args.scenarios:
+            selected = {name: selected[name] for name in args.scenarios.split(',')}
+
+        results = {'config': {'points': args.points, 'requests': args.requests, 'concurrency': args.concurrency}}
+        with BenchmarkServer(data_file) as server:
+            results['server_rss_mb_start'] = server.rss_mb()
+            for name, path_for in selected.items():
+                print(f"http_load: {name}", flush=True)
+                results[name] = run_scenario(server.port, path_for, args.requests, args.concurrency)
+                results[name]['server_rss_mb'] = server.rss_mb()
+    path = write_results('http_load', results, args.output)
+    print(f"http_load: results written to {path}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
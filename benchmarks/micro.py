@@ -0,0 +1,106 @@
+"""Micro-benchmarks of range selection and kline formatting over synthetic histories"""
+from typing import Callable, Dict, List
+import argparse
+import time
+import numpy as np
+from benchmarks.common import STEP_MS, parse_sizes, rss_mb, summarize, synthetic_series, write_results
+from app.services.timeseries_store import CoinSeries
+from app.services.candle_rollup import CandleRollup
+from app.services.price_feed import SimulatedFeed
+from app.utils.candle_utils import resample_ohlcv
+from app.utils.data_utils import compute_kline_columns, kline_rows
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.2, min_runs: int = 5, max_runs: int = 2000) -> List[float]:
+    """Run fn until min_time has passed (at least min_runs times), returning each duration"""
+    durations = []
+    started = time.perf_counter()
+    while len(durations) < max_runs and (len(durations) < min_runs or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - t0)
+    return durations
+
+
+def with_rate(durations: List[float], points: int) -> Dict:
+    summary = summarize(durations)
+    summary['points_per_s'] = round(points / float(np.median(durations)), 1)
+    return summary
+
+
+def bench_size(points: int, max_format_rows: int, seed: int = 0) -> Dict:
+    timestamps, prices, volumes, market_caps = synthetic_series(points, seed)
+    series = CoinSeries(timestamps, prices, volumes, market_caps)
+    rng = np.random.default_rng(seed)
+    span_ms = points * STEP_MS
+    window_ms = min(DAY_MS, span_ms)
+    starts = iter(rng.integers(timestamps[0], timestamps[0] + max(1, span_ms - window_ms), 100000).tolist())
+    results = {}
+
+    def random_window(width_ms: int = window_ms):
+        start = next(starts)
+        return start, start + width_ms
+
+    results['index_range_1d'] = summarize(measure(lambda: series.index_range(*random_window())))
+    results['window_1d'] = summarize(measure(lambda: series.window(*random_window())))
+
+    day = series.window(timestamps[0], timestamps[0] + window_ms)
+    results['kline_columns_1d_window'] = with_rate(measure(
+        lambda: compute_kline_columns(day.timestamps, day.prices, day.volumes, day.market_caps)), len(day))
+    results['kline_columns_full'] = with_rate(measure(
+        lambda: compute_kline_columns(timestamps, prices, volumes, market_caps), min_runs=3), points)
+
+    rows = min(points, max_format_rows)
+    columns = compute_kline_columns(timestamps[:rows], prices[:rows], volumes[:rows], market_caps[:rows])
+    results['kline_rows'] = with_rate(measure(lambda: kline_rows(columns), min_runs=3), rows)
+
+    for interval in ('1h', '1d'):
+        results[f"resample_{interval}_full"] = with_rate(measure(
+            lambda: resample_ohlcv(timestamps, prices, volumes, market_caps, interval), min_runs=3), points)
+
+    rollup = CandleRollup.from_series(series, '1h')
+    results['rollup_1h_window_30d'] = summarize(measure(
+        lambda: rollup.window(*random_window(30 * DAY_MS))))
+    ticks = iter(range(int(timestamps[-1]) + STEP_MS, int(timestamps[-1]) + STEP_MS * 10 ** 7, 1000))
+    results['rollup_1h_update'] = summarize(measure(lambda: rollup.update(next(ticks), 30000.0, 1.0)))
+
+    results['rss_mb'] = rss_mb()
+    return results
+
+
+def bench_feed(symbols: int, seed: int = 0) -> Dict:
+    """One simulated tick of `symbols` symbols, through the handler's dict API and the raw step"""
+    feed = SimulatedFeed({f"coin-{i}": 100.0 for i in range(symbols)}, seed=seed)
+    names = list(feed.symbols)
+    indices = np.arange(symbols)
+    ticks = iter(range(1000, 10 ** 12, 1000))
+    return {
+        'next_prices': with_rate(measure(lambda: feed.next_prices(names, next(ticks))), symbols),
+        'step': with_rate(measure(lambda: feed.step(indices, next(ticks))), symbols)
+    }
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1k,10k,100k,1m,10m', help='history sizes, e.g. 1k,100k,10m')
+    parser.add_argument('--max-format-rows', type=int, default=1000000,
+                        help='cap on rows turned into dicts by kline_rows')
+    parser.add_argument('--feed-symbols', type=int, default=10000, help='symbols per simulated feed tick')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/micro-<time>.json)')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for points in parse_sizes(args.sizes):
+        print(f"micro: {points} points", flush=True)
+        results[str(points)] = bench_size(points, args.max_format_rows)
+    print(f"micro: simulated feed, {args.feed_symbols} symbols", flush=True)
+    results[f"feed_{args.feed_symbols}"] = bench_feed(args.feed_symbols)
+    path = write_results('micro', results, args.output)
+    print(f"micro: results written to {path}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
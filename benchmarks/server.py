@@ -0,0 +1,51 @@
+"""Serve create_app() for the load benchmarks: python -m benchmarks.server PORT
+
+Prints READY once the port accepts connections. GET /bench/ticks returns the
+wall-clock time each tick sequence number was published, so clients can
+measure fan-out latency.
+"""
+import logging
+import socket
+import sys
+import threading
+import time
+from flask import jsonify
+from app import create_app
+from app.api.websocket import websocket_handler
+
+publish_times = {}
+
+
+def record_publish_times(broadcast):
+    def timed_broadcast(symbols, include_unsubscribed=False, due=None):
+        started = time.time()
+        ticks = broadcast(symbols, include_unsubscribed, due)
+        for tick in ticks:
+            publish_times[tick['seq']] = started
+        return ticks
+    return timed_broadcast
+
+
+def announce_when_listening(port: int) -> None:
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            print('READY', flush=True)
+            return
+        except OSError:
+            time.sleep(0.05)
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1])
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app, socketio = create_app()
+    websocket_handler._broadcast_tick = record_publish_times(websocket_handler._broadcast_tick)
+
+    @app.route('/bench/ticks')
+    def bench_ticks():
+        return jsonify({str(seq): started for seq, started in list(publish_times.items())})
+
+    threading.Thread(target=announce_when_listening, args=(port,), daemon=True).start()
+    socketio.run(app, host='127.0.0.1', port=port, debug=False, use_reloader=False,
+                 log_output=False, allow_unsafe_werkzeug=True)
@@ -0,0 +1,112 @@
+"""Socket.IO fan-out load: many local clients subscribed to the live price stream.
+
+Clients speak Engine.IO 4 over a plain websocket (the `websockets` package),
+so thousands of them fit in one asyncio loop. Latency is measured from the
+moment the server started publishing a tick (reported by the benchmark
+server at /bench/ticks) to its arrival at each client.
+"""
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import http.client
+import json
+import time
+import websockets
+from benchmarks.common import BenchmarkServer, summarize, write_results
+
+
+async def run_client(port: int, symbols: List[str], received: List[Tuple[int, float]], connect_times: List[float],
+                     stop: asyncio.Event, gate: asyncio.Semaphore) -> None:
+    url = f"ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket"
+    async with gate:
+        started = time.perf_counter()
+        websocket = await websockets.connect(url, max_size=None, open_timeout=60, ping_interval=None)
+        await websocket.recv()  # engine.io open packet
+        await websocket.send('40')
+        while not (await websocket.recv()).startswith('40'):
+            pass
+        await websocket.send('42' + json.dumps(['subscribe', symbols]))
+        connect_times.append(time.perf_counter() - started)
+
+    async def read():
+        async for message in websocket:
+            if message == '2':
+                await websocket.send('3')
+            elif message.startswith('42'):
+                event, payload = json.loads(message[2:])
+                if event == 'price_update' and 'seq' in payload:
+                    received.append((payload['seq'], time.time()))
+
+    reader = asyncio.ensure_future(read())
+    await stop.wait()
+    reader.cancel()
+    await websocket.close()
+
+
+def publish_times(port: int) -> Dict[int, float]:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    connection.request('GET', '/bench/ticks')
+    times = json.loads(connection.getresponse().read())
+    connection.close()
+    return {int(seq): started for seq, started in times.items()}
+
+
+async def run_load(port: int, clients: int, symbols: List[str], duration: float, connect_concurrency: int,
+                   server: BenchmarkServer) -> Dict:
+    received: List[Tuple[int, float]] = []
+    connect_times: List[float] = []
+    stop = asyncio.Event()
+    gate = asyncio.Semaphore(connect_concurrency)
+
+    connect_started = time.perf_counter()
+    tasks = [asyncio.ensure_future(run_client(port, symbols, received, connect_times, stop, gate))
+             for _ in range(clients)]
+    while len(connect_times) + sum(task.done() for task in tasks) < clients:
+        await asyncio.sleep(0.1)
+    connect_elapsed = time.perf_counter() - connect_started
+    failed = sum(1 for task in tasks if task.done() and task.exception() is not None)
+
+    measure_from = time.time()
+    received.clear()
+    await asyncio.sleep(duration)
+    measured = [entry for entry in received if entry[1] >= measure_from]
+    rss = server.rss_mb()
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    published = publish_times(port)
+    latencies = [arrived - published[seq] for seq, arrived in measured if seq in published]
+    ticks = {seq for seq, _ in measured}
+    fanout = summarize(latencies)
+    fanout['messages_per_s'] = round(len(measured) / duration, 1)
+    fanout['ticks'] = len(ticks)
+    fanout['expected_messages'] = len(ticks) * (clients - failed)
+    return {
+        'connect': dict(summarize(connect_times, connect_elapsed), failed=failed),
+        'fanout': fanout,
+        'server_rss_mb': rss
+    }
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--symbols', default='bitcoin,ethereum', help='symbols every client subscribes to')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of measured streaming')
+    parser.add_argument('--connect-concurrency', type=int, default=100, help='handshakes in flight at once')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/socketio_load-<time>.json)')
+    args = parser.parse_args(argv)
+
+    symbols = [symbol for symbol in args.symbols.split(',') if symbol]
+    with BenchmarkServer() as server:
+        print(f"socketio_load: {args.clients} clients for {args.duration}s", flush=True)
+        results = asyncio.run(run_load(server.port, args.clients, symbols, args.duration,
+                                       args.connect_concurrency, server))
+    results['config'] = {'clients': args.clients, 'symbols': symbols, 'duration': args.duration}
+    path = write_results('socketio_load', results, args.output)
+    print(f"socketio_load: results written to {path}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
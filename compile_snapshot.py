@@ -0,0 +1,10 @@
+import sys
+from app.config.settings import DATA_FILE, DATA_SNAPSHOT_FILE
+from app.services.snapshot_file import compile_snapshot, file_version
+
+# build the memory-mapped data snapshot ahead of deployment
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else DATA_FILE
+    output = sys.argv[2] if len(sys.argv) > 2 else DATA_SNAPSHOT_FILE
+    compile_snapshot(source, output, file_version(source))
+    print(f"Compiled {source} -> {output}")